@@ -0,0 +1,208 @@
+"""
+Contrôle d'admission et délestage par endpoint
+
+Chaque endpoint limité a un nombre max de requêtes en cours et une file
+d'attente bornée. Au-delà, la requête est refusée tout de suite au lieu
+d'attendre dans le threadpool :
+- file pleine : 429 + Retry-After
+- attente trop longue dans la file : 503 + Retry-After
+- endpoint de priorité basse (drift) pendant que des prédictions attendent : 503
+
+Le middleware tourne dans la boucle asyncio du worker : les compteurs ne
+sont modifiés que depuis cette boucle et n'ont pas besoin de verrou.
+`backlog` (travail accepté mais encore en attente hors du limiteur, ex.
+contrôles de drift en tâche de fond) est un simple entier réaffecté.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT, mark_admitted
+
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+DEPRIORITIZED = "deprioritized"
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class EndpointLimiter:
+    def __init__(
+        self,
+        endpoint: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float = 1.0,
+        retry_after: int = 1,
+        priority: int = 0,
+    ):
+        self.endpoint = endpoint
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, retry_after)
+        # Plus grand = plus prioritaire
+        self.priority = priority
+
+        self.in_flight = 0
+        self.backlog = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = {QUEUE_FULL: 0, QUEUE_TIMEOUT: 0, DEPRIORITIZED: 0}
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters) + self.backlog
+
+    def set_backlog(self, value: int):
+        self.backlog = value
+        self._update_gauges()
+
+    def reject(self, status_code: int, reason: str) -> Rejected:
+        self.rejected[reason] += 1
+        ADMISSION_REJECTED.inc(endpoint=self.endpoint, reason=reason)
+        return Rejected(status_code, reason, self.retry_after)
+
+    async def acquire(self):
+        start = time.perf_counter()
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self._admitted(start)
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise self.reject(429, QUEUE_FULL)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # Place cédée par release() au même moment
+                if isinstance(e, asyncio.CancelledError):
+                    self.release()
+                    raise
+                self._admitted(start)
+                return
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            self._update_gauges()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self.reject(503, QUEUE_TIMEOUT)
+        self._admitted(start)
+
+    def release(self):
+        # La place passe directement au premier en attente (in_flight inchangé)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.in_flight -= 1
+        self._update_gauges()
+
+    def _admitted(self, start: float):
+        self.admitted += 1
+        ADMISSION_WAIT.observe(time.perf_counter() - start, endpoint=self.endpoint)
+        self._update_gauges()
+
+    def _update_gauges(self):
+        ADMISSION_IN_FLIGHT.set(self.in_flight, endpoint=self.endpoint)
+        ADMISSION_QUEUE_DEPTH.set(len(self._waiters) + self.backlog, endpoint=self.endpoint)
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout,
+            "priority": self.priority,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "backlog": self.backlog,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+class AdmissionController:
+    """
+    Limiteurs indexés par (méthode, chemin) ; un endpoint de priorité basse
+    est délesté dès qu'un endpoint plus prioritaire a des requêtes en file
+    """
+
+    def __init__(self, limiters: Iterable[Tuple[str, EndpointLimiter]]):
+        self.limiters: Dict[Tuple[str, str], EndpointLimiter] = {
+            (method.upper(), limiter.endpoint): limiter for method, limiter in limiters
+        }
+
+    def match(self, method: str, path: str) -> Optional[EndpointLimiter]:
+        return self.limiters.get((method, path))
+
+    async def acquire(self, limiter: EndpointLimiter):
+        if any(
+            other.priority > limiter.priority and other.queue_depth > 0
+            for other in self.limiters.values()
+        ):
+            raise limiter.reject(503, DEPRIORITIZED)
+        await limiter.acquire()
+
+    def queue_depth(self) -> int:
+        return sum(limiter.queue_depth for limiter in self.limiters.values())
+
+    def stats(self) -> Dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "in_flight": sum(limiter.in_flight for limiter in self.limiters.values()),
+            "endpoints": {limiter.endpoint: limiter.stats() for limiter in self.limiters.values()},
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI : réserve une place avant l'endpoint, la libère une
+    fois la réponse envoyée ; refus immédiat sans lire le corps
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        limiter = None
+        if scope["type"] == "http":
+            limiter = self.controller.match(scope.get("method", ""), scope.get("path", ""))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(limiter)
+        except Rejected as e:
+            response = JSONResponse(
+                status_code=e.status_code,
+                content={"detail": f"Overloaded ({e.reason}), retry later"},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        mark_admitted()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,182 @@
+"""
+Micro-batching des requêtes /predict concurrentes
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+
+def _bucket_bounds(max_value: int) -> List[int]:
+    """
+    Bornes de buckets en puissances de 2 jusqu'à max_value inclus
+    """
+    bounds = [1]
+    while bounds[-1] < max_value:
+        bounds.append(bounds[-1] * 2)
+    return bounds
+
+
+class SizeHistogram:
+    """
+    Histogramme cumulatif simple (buckets puissances de 2)
+    """
+
+    def __init__(self, max_value: int):
+        self.bounds = _bucket_bounds(max(1, max_value))
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def observe(self, value: int):
+        idx = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                idx = i
+                break
+        self.counts[idx] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        buckets = {f"le_{b}": c for b, c in zip(self.bounds, self.counts)}
+        buckets["gt_max"] = self.counts[-1]
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Regroupe les lignes soumises par des requêtes concurrentes et les score
+    en un seul appel, au plus `max_batch` lignes ou `max_wait_us` microsecondes
+    après la première ligne en attente.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        n_features: int,
+        max_wait_us: int = 2000,
+        max_batch: int = 64,
+    ):
+        self.predict_fn = predict_fn
+        self.n_features = n_features
+        self.max_wait = max(0, max_wait_us) / 1_000_000
+        self.max_batch = max(1, max_batch)
+
+        self._queue: "queue.Queue[Tuple[List[float], Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+        self.batch_sizes = SizeHistogram(self.max_batch)
+        self.queue_depths = SizeHistogram(self.max_batch * 4)
+        self.rows_scored = 0
+        self.errors = 0
+
+    # -------- Cycle de vie
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="microbatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+            self._thread = None
+        # Lignes encore en file (soumises avant l'arrêt) : scorées ici, pas abandonnées
+        pending = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                pending.append(item)
+        if pending:
+            self._score(pending)
+
+    # -------- API
+    def submit(self, row: List[float]) -> Future:
+        future: Future = Future()
+        with self._lock:
+            running = self._running
+            if running:
+                self._queue.put((row, future))
+        if not running:
+            # Batcher arrêté (ex. remplacé lors d'un rechargement du modèle) : scoring direct
+            self._score([(row, future)])
+        return future
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": self._running,
+                "max_wait_us": int(self.max_wait * 1_000_000),
+                "max_batch": self.max_batch,
+                "queue_depth": self._queue.qsize(),
+                "rows_scored": self.rows_scored,
+                "errors": self.errors,
+                "batch_size": self.batch_sizes.snapshot(),
+                "queue_depth_at_dispatch": self.queue_depths.snapshot(),
+            }
+
+    # -------- Boucle de scoring
+    def _collect(self) -> List[Tuple[List[float], Future]]:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._collect()
+            if batch:
+                self._score(batch)
+
+    def _score(self, batch: List[Tuple[List[float], Future]]):
+        X = np.empty((len(batch), self.n_features), dtype=np.float64)
+        for i, (row, _) in enumerate(batch):
+            X[i] = row
+
+        try:
+            probas = self.predict_fn(X)
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._lock:
+            self.batch_sizes.observe(len(batch))
+            self.queue_depths.observe(self._queue.qsize())
+            self.rows_scored += len(batch)
+
+        for (_, future), proba in zip(batch, probas.tolist()):
+            future.set_result(proba)
@@ -0,0 +1,125 @@
+"""
+Cache LRU/TTL borné des prédictions
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FeatureKey = Tuple[str, Tuple[float, ...]]
+
+
+def canonical_key(fingerprint: str, row: Iterable[float]) -> FeatureKey:
+    """
+    Clé canonique : empreinte du modèle + les 10 features en float
+    (650 et 650.0 donnent la même clé)
+    """
+    return fingerprint, tuple(float(v) for v in row)
+
+
+def _estimate_entry_bytes(n_features: int) -> int:
+    """
+    Taille approximative d'une entrée (clé, valeur, expiration, noeud OrderedDict)
+    """
+    key = canonical_key("0" * 16, [123456.789] * n_features)
+    value = (0.5, time.monotonic())
+    size = sys.getsizeof(key) + sys.getsizeof(key[0]) + sys.getsizeof(key[1])
+    size += sum(sys.getsizeof(v) for v in key[1])
+    size += sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
+    # noeud de la liste chaînée + slot de la table de hachage
+    return size + 100
+
+
+class PredictionCache:
+    """
+    Cache thread-safe des probabilités de churn, borné en nombre d'entrées
+    et en mémoire, avec expiration optionnelle (ttl_seconds <= 0 : pas de TTL)
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float, n_features: int):
+        self.entry_bytes = _estimate_entry_bytes(n_features)
+        self.capacity = max(1, min(max_entries, max_bytes // self.entry_bytes))
+        self.ttl = ttl_seconds
+        self.fingerprint = ""
+
+        self._data: "OrderedDict[FeatureKey, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    # -------- Version du modèle
+    def set_model_fingerprint(self, fingerprint: str):
+        """
+        Un nouveau modèle invalide toutes les entrées existantes
+        """
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                self._data.clear()
+                self.fingerprint = fingerprint
+
+    def key(self, row: Iterable[float], fingerprint: Optional[str] = None) -> FeatureKey:
+        # fingerprint : celui du modèle qui scorera la ligne (défaut : modèle courant)
+        return canonical_key(fingerprint if fingerprint is not None else self.fingerprint, row)
+
+    # -------- Lecture / écriture
+    def get(self, key: FeatureKey) -> Optional[float]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            proba, expires_at = entry
+            if self.ttl > 0 and expires_at < now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return proba
+
+    def get_many(self, keys: List[FeatureKey]) -> List[Optional[float]]:
+        return [self.get(key) for key in keys]
+
+    def put(self, key: FeatureKey, proba: float):
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else 0.0
+        with self._lock:
+            # clé calculée avec une ancienne empreinte : le modèle a changé entre-temps
+            if key[0] != self.fingerprint:
+                return
+            self._data[key] = (proba, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def put_many(self, keys: List[FeatureKey], probas: List[float]):
+        for key, proba in zip(keys, probas):
+            self.put(key, proba)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "entries": len(self._data),
+                "capacity": self.capacity,
+                "approx_bytes": len(self._data) * self.entry_bytes,
+                "ttl_seconds": self.ttl,
+                "model_fingerprint": self.fingerprint,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,123 @@
+"""
+Génération / transformation de jeux de données par blocs, à mémoire constante
+
+Utilisé par generate_data.py et drift_data_gen.py :
+- chaque bloc a son propre générateur aléatoire, dérivé de (graine, numéro
+  de bloc) : le résultat ne dépend pas du nombre de workers
+- blocs traités en parallèle (processus) avec au plus 2 blocs en vol par
+  worker, écrits dans l'ordre au fil de l'eau
+- sortie CSV ou Parquet (selon l'extension), comme batch_score.py
+"""
+
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# =========================
+# BLOCS ET GRAINES
+# =========================
+def chunk_bounds(n_rows: int, chunk_size: int) -> List[Tuple[int, int, int]]:
+    """
+    (numéro, début, fin) de chaque bloc
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size doit être > 0")
+    return [
+        (index, start, min(start + chunk_size, n_rows))
+        for index, start in enumerate(range(0, n_rows, chunk_size))
+    ]
+
+
+def chunk_rng(seed: int, index: int) -> np.random.RandomState:
+    """
+    Générateur du bloc `index`. Le bloc 0 utilise la graine telle quelle :
+    un fichier tenant en un bloc est identique à l'ancien np.random.seed(seed).
+    """
+    if index == 0:
+        return np.random.RandomState(seed)
+    return np.random.RandomState(np.random.SeedSequence([seed, index]).generate_state(8))
+
+
+# =========================
+# LECTURE / ÉCRITURE
+# =========================
+def is_parquet(path) -> bool:
+    return str(path).endswith(".parquet")
+
+
+def iter_table_chunks(input_file, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Blocs de lignes d'un CSV ou d'un Parquet, sans charger tout le fichier
+    """
+    if is_parquet(input_file):
+        import pyarrow.parquet as pq
+
+        # pre_buffer=False : sinon la lecture anticipée garde des tampons et la
+        # mémoire croît avec la taille du fichier
+        parquet_file = pq.ParquetFile(input_file, pre_buffer=False)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+        return
+
+    yield from pd.read_csv(input_file, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """
+    Écrit des blocs de lignes dans l'ordre, en CSV ou en Parquet
+    """
+
+    def __init__(self, output_file):
+        self.output_file = str(output_file)
+        self.parquet = is_parquet(output_file)
+        self.rows = 0
+        self._writer = None
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.output_file, table.schema)
+            self._writer.write_table(table)
+        else:
+            first = self.rows == 0
+            df.to_csv(self.output_file, mode="w" if first else "a", header=first, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# =========================
+# EXÉCUTION PARALLÈLE ORDONNÉE
+# =========================
+def map_chunks(func: Callable, tasks: Iterable, workers: int = 1) -> Iterator:
+    """
+    func(task) pour chaque tâche, résultats rendus dans l'ordre des tâches.
+    Au plus 2 tâches en vol par worker : la mémoire ne dépend pas du nombre
+    de blocs. `func` doit être définie au niveau d'un module (picklable).
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+
+    context = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+    max_in_flight = workers * 2
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        for task in tasks:
+            pending.append(executor.submit(func, task))
+            while len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
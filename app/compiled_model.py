@@ -0,0 +1,175 @@
+"""
+Moteur d'inférence compilé pour le RandomForestClassifier
+
+Tous les arbres de la forêt sont aplatis dans quelques tableaux NumPy
+(feature, threshold, left, right, value) et parcourus de façon vectorisée,
+sans la validation d'entrée ni le dispatch joblib par arbre de sklearn.
+Les probabilités sont identiques bit à bit à model.predict_proba.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+# Tableaux persistés par save() (un fichier .npy chacun, mappables en lecture seule)
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots", "classes", "children")
+META_FILE = "forest.json"
+
+# Lignes parcourues à la fois : les tableaux (arbres, lignes) restent dans le cache CPU
+DEFAULT_CHUNK_SIZE = 512
+
+
+class CompiledForest:
+    """
+    Forêt aplatie : les noeuds de tous les arbres sont concaténés et les
+    indices des enfants sont globaux. Les feuilles bouclent sur elles-mêmes
+    (seuil +inf), ce qui permet de parcourir tous les arbres `max_depth` fois
+    sans test de fin.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes, children=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_trees = len(roots)
+        self.n_classes = value.shape[1]
+        # children[2 * node + go_left] : un seul gather par niveau
+        self.children = children if children is not None else np.stack([right, left], axis=1).ravel()
+
+    # =========================
+    # CONSTRUCTION
+    # =========================
+    @classmethod
+    def from_sklearn(cls, model) -> "CompiledForest":
+        """
+        Aplatit un RandomForestClassifier (mono-sortie) entraîné
+        """
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("Seuls les modèles mono-sortie sont supportés")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+            threshold = np.where(is_leaf, np.inf, tree.threshold).astype(np.float64)
+            left = np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32)
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(_leaf_proba(tree.value[:, 0, : model.n_classes_]))
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+        )
+
+    # =========================
+    # PERSISTANCE
+    # =========================
+    def save(self, directory):
+        """
+        Un .npy par tableau + forest.json ; relu par load(), éventuellement en mmap
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in ARRAY_NAMES:
+            array = self.classes_ if name == "classes" else getattr(self, name)
+            np.save(directory / f"{name}.npy", np.ascontiguousarray(array), allow_pickle=False)
+        meta = {"max_depth": self.max_depth, "n_trees": self.n_trees, "n_classes": self.n_classes}
+        (directory / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> "CompiledForest":
+        """
+        mmap=True : tableaux mappés en lecture seule, les pages sont partagées
+        (cache de pages de l'OS) entre tous les processus qui mappent le même dossier
+        """
+        directory = Path(directory)
+        meta = json.loads((directory / META_FILE).read_text(encoding="utf-8"))
+        arrays = {}
+        for name in ARRAY_NAMES:
+            array = np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None, allow_pickle=False)
+            # Vue ndarray simple : les résultats de np.take ne sont pas des memmap
+            arrays[name] = array.view(np.ndarray)
+        return cls(max_depth=meta["max_depth"], **arrays)
+
+    # =========================
+    # PREDICTION
+    # =========================
+    def predict_proba(self, X, chunk_size: int = DEFAULT_CHUNK_SIZE) -> np.ndarray:
+        """
+        Probabilités par classe, même contrat que RandomForestClassifier.predict_proba
+        """
+        # sklearn compare des features float32 à des seuils float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_rows = X.shape[0]
+        proba = np.zeros((n_rows, self.n_classes), dtype=np.float64)
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            proba[start:stop] = self._predict_chunk(X[start:stop])
+        return proba
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        flat_X = np.ascontiguousarray(X).ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * n_features)[np.newaxis, :]
+        nodes = np.repeat(self.roots[:, np.newaxis], n_rows, axis=1)
+
+        for _ in range(self.max_depth):
+            x = np.take(flat_X, row_offsets + np.take(self.feature, nodes))
+            go_left = x <= np.take(self.threshold, nodes)
+            nodes = np.take(self.children, 2 * nodes + go_left)
+
+        # Somme arbre par arbre dans l'ordre, comme sklearn, puis moyenne
+        leaf_values = np.take(self.value, nodes, axis=0)
+        out = np.zeros((n_rows, self.n_classes), dtype=np.float64)
+        for t in range(self.n_trees):
+            out += leaf_values[t]
+        out /= self.n_trees
+        return out
+
+
+def _leaf_proba(value: np.ndarray) -> np.ndarray:
+    """
+    Probabilités par noeud telles que renvoyées par DecisionTreeClassifier.predict_proba.
+    Depuis sklearn 1.4 tree_.value contient déjà des fractions ; avant, des effectifs
+    que predict_proba normalisait.
+    """
+    value = np.asarray(value, dtype=np.float64)
+    sums = value.sum(axis=1)
+    if np.allclose(sums, 1.0):
+        return value.copy()
+    sums[sums == 0.0] = 1.0
+    return value / sums[:, np.newaxis]
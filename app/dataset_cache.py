@@ -0,0 +1,254 @@
+"""
+Cache binaire des CSV (référence, production, entraînement)
+
+Un CSV est converti une fois en colonnes typées : un .npy par colonne
+dans <cache>/<sha256 du CSV>/, plus meta.json (noms, dtypes, nombre de
+lignes). Les lectures suivantes mappent les .npy en lecture seule
+(np.load(mmap_mode="r")) et construisent le DataFrame sans copie : ni
+parsing, ni inférence de types, et seules les pages lues sont chargées.
+
+L'empreinte d'un fichier est mémorisée par (chemin, mtime, taille) dans
+<cache>/sources/ : un nouveau processus ne relit pas tout le CSV pour
+retrouver son entrée.
+
+Comme pour les graphiques (app/figure_cache.py), les entrées les plus
+anciennes (dernier accès) sont supprimées au-delà d'un âge ou d'une taille
+totale : un CSV de production régénéré ne laisse pas sa copie derrière lui.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.hashing import file_digest
+
+DEFAULT_CACHE_DIR = os.getenv("DATA_CACHE_DIR", "data/.cache")
+CACHE_ENABLED = os.getenv("DATA_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+CACHE_MAX_BYTES = int(os.getenv("DATA_CACHE_MAX_MB", "2048")) * 1024 * 1024
+CACHE_MAX_AGE_SECONDS = float(os.getenv("DATA_CACHE_MAX_AGE_HOURS", "168")) * 3600
+META_FILE = "meta.json"
+# À incrémenter si le format des entrées change
+CACHE_FORMAT = 1
+
+logger = logging.getLogger("bank-churn-api")
+
+
+# =========================
+# EMPREINTE DE LA SOURCE
+# =========================
+def _source_record(cache_dir: Path, path: Path) -> Path:
+    name = hashlib.sha1(str(path).encode("utf-8")).hexdigest()
+    return cache_dir / "sources" / f"{name}.json"
+
+
+def source_digest(path, cache_dir=DEFAULT_CACHE_DIR) -> str:
+    """
+    sha256 du CSV ; recalculé seulement si mtime / taille ont changé
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    record_path = _source_record(Path(cache_dir), path)
+    try:
+        record = json.loads(record_path.read_text(encoding="utf-8"))
+        if record["mtime_ns"] == stat.st_mtime_ns and record["size"] == stat.st_size:
+            return record["digest"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    digest = file_digest(path)
+    record_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(record_path, json.dumps({
+        "path": str(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "digest": digest,
+    }))
+    return digest
+
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+# =========================
+# CONVERSION
+# =========================
+def _save_columns(df: pd.DataFrame, directory: Path, source: Path) -> Dict:
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        entry = {"name": str(name), "file": f"{i}.npy"}
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            np.save(directory / entry["file"], np.ascontiguousarray(series.to_numpy()), allow_pickle=False)
+            entry["kind"] = "numeric"
+        else:
+            # Texte : codes entiers + catégories (pas de pickle dans les .npy)
+            codes, categories = pd.factorize(series, use_na_sentinel=True)
+            np.save(directory / entry["file"], codes.astype(np.int32), allow_pickle=False)
+            entry["kind"] = "categorical"
+            entry["categories"] = [str(c) for c in categories]
+        entry["dtype"] = str(series.dtype)
+        columns.append(entry)
+
+    meta = {"format": CACHE_FORMAT, "source": str(source), "rows": int(len(df)), "columns": columns}
+    (directory / META_FILE).write_text(json.dumps(meta), encoding="utf-8")
+    return meta
+
+
+def convert(path, cache_dir=DEFAULT_CACHE_DIR, digest: Optional[str] = None) -> Path:
+    """
+    CSV -> dossier de colonnes .npy (écrit dans un dossier temporaire puis renommé)
+    """
+    path = Path(path).resolve()
+    cache_dir = Path(cache_dir)
+    digest = digest or source_digest(path, cache_dir)
+    entry = cache_dir / digest
+    if (entry / META_FILE).is_file():
+        return entry
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{digest}.", dir=cache_dir))
+    try:
+        _save_columns(pd.read_csv(path), tmp_dir, path)
+        os.chmod(tmp_dir, 0o755)
+        try:
+            os.replace(tmp_dir, entry)
+        except OSError:
+            # Même CSV converti en parallèle par un autre processus
+            if not (entry / META_FILE).is_file():
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    evict(cache_dir, keep=digest)
+    return entry
+
+
+# =========================
+# ÉVICTION
+# =========================
+def _entries(cache_dir: Path):
+    entries = []
+    for entry in cache_dir.iterdir():
+        # sources/ et dossiers temporaires (.<digest>.xxx) exclus
+        if not entry.is_dir() or entry.name.startswith(".") or entry.name == "sources":
+            continue
+        size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+        entries.append((entry.stat().st_mtime, size, entry))
+    return sorted(entries, key=lambda e: e[0])
+
+
+def evict(
+    cache_dir=DEFAULT_CACHE_DIR,
+    max_bytes: int = CACHE_MAX_BYTES,
+    max_age_seconds: float = CACHE_MAX_AGE_SECONDS,
+    keep: Optional[str] = None,
+) -> int:
+    """
+    Supprime les entrées non lues depuis max_age_seconds, puis les plus
+    anciennes tant que le total dépasse max_bytes. Renvoie le nombre
+    d'entrées supprimées. Un processus qui mappe déjà une entrée supprimée
+    garde ses pages (fichiers détachés, pas effacés sous lui).
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return 0
+
+    now = time.time()
+    entries = _entries(cache_dir)
+    total = sum(size for _, size, _ in entries)
+    removed = set()
+    for accessed, size, entry in entries:
+        if entry.name == keep:
+            continue
+        if now - accessed > max_age_seconds or total > max_bytes:
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+            removed.add(entry.name)
+
+    if removed:
+        # Empreintes qui pointent vers une entrée supprimée
+        for record in (cache_dir / "sources").glob("*.json"):
+            try:
+                if json.loads(record.read_text(encoding="utf-8")).get("digest") in removed:
+                    record.unlink()
+            except (OSError, ValueError):
+                pass
+        logger.info("dataset_cache_eviction", extra={
+            "custom_dimensions": {
+                "cache_dir": str(cache_dir),
+                "evicted": len(removed),
+                "bytes": total
+            }
+        })
+    return len(removed)
+
+
+# =========================
+# LECTURE
+# =========================
+def _load_entry(entry: Path, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    meta = json.loads((entry / META_FILE).read_text(encoding="utf-8"))
+    wanted = None if columns is None else set(columns)
+    data = {}
+    for column in meta["columns"]:
+        if wanted is not None and column["name"] not in wanted:
+            continue
+        values = np.load(entry / column["file"], mmap_mode="r", allow_pickle=False).view(np.ndarray)
+        if column["kind"] == "categorical":
+            values = pd.Series(
+                pd.Categorical.from_codes(np.asarray(values), categories=column["categories"])
+            ).astype(column["dtype"]).array
+        data[column["name"]] = values
+
+    if wanted is not None:
+        missing = [c for c in columns if c not in data]
+        if missing:
+            raise ValueError(f"Colonnes absentes de {meta['source']}: {missing}")
+        data = {c: data[c] for c in columns}
+    # copy=False : les colonnes restent des vues sur les fichiers mappés
+    return pd.DataFrame(data, copy=False)
+
+
+def read_table(
+    path,
+    columns: Optional[Sequence[str]] = None,
+    cache_dir=DEFAULT_CACHE_DIR,
+    use_cache: Optional[bool] = None,
+) -> pd.DataFrame:
+    """
+    Remplace pd.read_csv(path[, usecols=columns]) : colonnes mappées en
+    lecture seule depuis le cache (converti au premier appel). Les colonnes
+    ne sont pas modifiables sur place : copier avant de les modifier.
+    """
+    if CACHE_ENABLED if use_cache is None else use_cache:
+        try:
+            entry = convert(path, cache_dir)
+        except OSError as e:
+            if not Path(path).exists():
+                raise
+            # Dossier de cache non inscriptible (image en lecture seule...) : lecture CSV
+            logger.warning("dataset_cache_unavailable", extra={
+                "custom_dimensions": {"source": str(path), "cache_dir": str(cache_dir), "error": str(e)}
+            })
+        else:
+            # Dernier accès = mtime du dossier (sert à l'éviction)
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+            return _load_entry(entry, columns)
+    return pd.read_csv(path, usecols=columns)[list(columns)] if columns else pd.read_csv(path)
+
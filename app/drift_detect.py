@@ -3,25 +3,24 @@ Détection de Data Drift avec visualisations et alertes
 Compatible API / Docker / Azure
 """
 
-# =========================
-# BACKEND MATPLOTLIB SAFE
-# =========================
-import matplotlib
-matplotlib.use("Agg")
-
 # =========================
 # IMPORTS
 # =========================
+# matplotlib / seaborn ne sont importés qu'au moment de dessiner
+# (voir _plotting) : l'API démarre sans la pile graphique.
 import pandas as pd
 import numpy as np
-from scipy.stats import ks_2samp, chi2_contingency
 import json
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 import os
 
+from app.dataset_cache import read_table
+from app.drift_engine import compute_drift
+from app.figure_cache import FigureCache, figure_key
+from app.hashing import file_digest
+from app.reference_profile import get_reference_profile
+
 # =========================
 # PATHS ROBUSTES
 # =========================
@@ -37,10 +36,16 @@ def detect_drift(
     reference_file: str,
     production_file: str,
     threshold: float = 0.05,
-    output_dir: Path | None = None
+    output_dir: Path | None = None,
+    n_jobs: int = 0,
+    render: bool = True,
+    figure_cache: FigureCache | None = None,
 ):
     """
     Détecte le drift entre données de référence et production
+    (n_jobs : threads du moteur de drift, 0 = automatique selon la largeur ;
+    render=False : pas de graphiques, voir render_drift_report ;
+    figure_cache : cache des graphiques, par défaut <output_dir>/figures)
     """
 
     # -------- Paths sécurisés
@@ -61,67 +66,45 @@ def detect_drift(
         raise FileNotFoundError(f"Fichier de production introuvable: {production_file}")
 
     # -------- Chargement données
-    ref_data = pd.read_csv(reference_file)
-    prod_data = pd.read_csv(production_file)
-
-    drift_results = {}
-    continuous_features = []
-    categorical_features = []
-
-    # -------- Classification des features
-    for col in ref_data.columns:
-        if col == "Exited":
-            continue
-        if col in prod_data.columns:
-            if ref_data[col].dtype in ["int64", "float64"] and ref_data[col].nunique() > 10:
-                continuous_features.append(col)
-            else:
-                categorical_features.append(col)
+    # Côté référence : profil trié/compté une seule fois, recalculé si le fichier change
+    profile = get_reference_profile(reference_file)
+    prod_data = read_table(production_file)
+
+    continuous_features = [c for c in profile.continuous if c in prod_data.columns]
+    categorical_features = [c for c in profile.categorical if c in prod_data.columns]
+
+    # Les colonnes catégorielles non numériques gardent un comptage pandas
+    categorical_extra = {
+        col: prod_data[col].value_counts().to_dict()
+        for col in categorical_features
+        if not pd.api.types.is_numeric_dtype(prod_data[col])
+    }
+    numeric_categorical = [c for c in categorical_features if c not in categorical_extra]
 
     # =========================
-    # DRIFT CONTINU
+    # KS + CHI2 EN LOT
     # =========================
-    for col in continuous_features:
-        ref_values = ref_data[col].dropna()
-        prod_values = prod_data[col].dropna()
-
-        statistic, p_value = ks_2samp(ref_values, prod_values)
-        drift_detected = p_value < threshold
-
-        drift_results[col] = {
-            "p_value": float(p_value),
-            "statistic": float(statistic),
-            "drift_detected": bool(drift_detected),
-            "type": "continuous",
-            "ref_mean": float(ref_values.mean()),
-            "prod_mean": float(prod_values.mean()),
-            "ref_std": float(ref_values.std()),
-            "prod_std": float(prod_values.std()),
-        }
+    drift_results, prod_values = compute_drift(
+        profile,
+        continuous_features,
+        np.asfortranarray(prod_data[continuous_features].to_numpy(dtype=np.float64)),
+        categorical_features,
+        np.asfortranarray(prod_data[numeric_categorical].to_numpy(dtype=np.float64)),
+        threshold=threshold,
+        n_jobs=n_jobs,
+        categorical_extra=categorical_extra,
+    )
 
-    # =========================
-    # DRIFT CATÉGORIEL
-    # =========================
-    for col in categorical_features:
-        try:
-            ref_counts = ref_data[col].value_counts()
-            prod_counts = prod_data[col].value_counts()
-
-            all_values = set(ref_counts.index) | set(prod_counts.index)
-            ref_aligned = [ref_counts.get(v, 0) for v in all_values]
-            prod_aligned = [prod_counts.get(v, 0) for v in all_values]
-
-            contingency_table = np.array([ref_aligned, prod_aligned])
-            chi2, p_value, _, _ = chi2_contingency(contingency_table)
-
-            drift_results[col] = {
-                "p_value": float(p_value),
-                "chi2": float(chi2),
-                "drift_detected": bool(p_value < threshold),
-                "type": "categorical",
-            }
-        except Exception:
-            continue
+    # Moyennes / écarts-types (pandas, mêmes valeurs qu'avant)
+    for col in continuous_features:
+        ref = profile.continuous[col]
+        prod_series = prod_data[col].dropna()
+        drift_results[col].update({
+            "ref_mean": ref.mean,
+            "prod_mean": float(prod_series.mean()),
+            "ref_std": ref.std,
+            "prod_std": float(prod_series.std()),
+        })
 
     # =========================
     # RÉSUMÉ
@@ -139,13 +122,19 @@ def detect_drift(
     # =========================
     # VISUALISATIONS
     # =========================
-    create_drift_visualizations(
-        ref_data,
-        prod_data,
-        drift_results,
-        continuous_features,
-        output_dir,
-    )
+    artifacts = None
+    if render:
+        artifacts = render_cached_visualizations(
+            reference_file,
+            production_file,
+            threshold,
+            {col: profile.continuous[col].sorted_values for col in continuous_features},
+            prod_values,
+            drift_results,
+            continuous_features,
+            output_dir,
+            figure_cache,
+        )
 
     # =========================
     # SAUVEGARDE RAPPORT JSON
@@ -156,6 +145,10 @@ def detect_drift(
         "features_analyzed": len(drift_results),
         "features_drifted": len(drifted_features),
         "drift_percentage": drift_percentage,
+        "reference_file": str(reference_file.resolve()),
+        "production_file": str(production_file.resolve()),
+        "rendered": render,
+        "artifacts": artifacts,
         "results": drift_results,
     }
 
@@ -169,16 +162,109 @@ def detect_drift(
 # =========================
 # VISUALISATIONS
 # =========================
+def _plotting():
+    """
+    Import différé de la pile graphique (backend sans écran)
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    return plt, sns
+
+
+def render_drift_report(report_path, output_dir: Path | None = None, figure_cache: FigureCache | None = None):
+    """
+    Dessine après coup les graphiques d'un rapport JSON produit avec
+    render=False (rendu différé, hors du processus de l'API)
+    """
+    report_path = Path(report_path)
+    with open(report_path, encoding="utf-8") as f:
+        report = json.load(f)
+
+    if output_dir is None:
+        output_dir = report_path.parent
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    drift_results = report["results"]
+    profile = get_reference_profile(report["reference_file"])
+    prod_data = read_table(report["production_file"])
+
+    continuous_features = [
+        col for col, r in drift_results.items()
+        if r.get("type") == "continuous" and col in profile.continuous
+    ]
+    report["artifacts"] = render_cached_visualizations(
+        report["reference_file"],
+        report["production_file"],
+        report["threshold"],
+        {col: profile.continuous[col].sorted_values for col in continuous_features},
+        {col: np.sort(prod_data[col].dropna().to_numpy()) for col in continuous_features},
+        drift_results,
+        continuous_features,
+        output_dir,
+        figure_cache,
+    )
+
+    report["rendered"] = True
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    return output_dir
+
+
+def render_cached_visualizations(
+    reference_file,
+    production_file,
+    threshold,
+    ref_values,
+    prod_values,
+    drift_results,
+    continuous_features,
+    output_dir: Path,
+    figure_cache: FigureCache | None = None,
+):
+    """
+    Graphiques via le cache adressé par contenu : redessinés seulement si
+    les données, le seuil ou la liste des features changent. Les PNG sont
+    aussi publiés dans output_dir sous leurs noms habituels.
+    """
+    if figure_cache is None:
+        figure_cache = FigureCache(Path(output_dir) / "figures")
+
+    key = figure_key(
+        file_digest(reference_file),
+        file_digest(production_file),
+        threshold,
+        list(drift_results),
+    )
+    entry, cache_hit = figure_cache.get_or_render(
+        key,
+        lambda target_dir: create_drift_visualizations(
+            ref_values, prod_values, drift_results, continuous_features, target_dir
+        ),
+    )
+
+    return {
+        "cache_key": key,
+        "cache_hit": cache_hit,
+        "figures": figure_cache.publish(entry, output_dir),
+    }
+
+
 def create_drift_visualizations(
-    ref_data,
-    prod_data,
+    ref_values,
+    prod_values,
     drift_results,
     continuous_features,
     output_dir: Path,
 ):
     """
     Crée les graphiques de drift
+    (ref_values / prod_values : valeurs sans NaN de chaque feature continue)
     """
+    plt, sns = _plotting()
 
     # -------- Distributions
     if continuous_features:
@@ -191,8 +277,8 @@ def create_drift_visualizations(
         for idx, col in enumerate(continuous_features):
             ax = axes[idx]
 
-            ax.hist(ref_data[col].dropna(), bins=30, alpha=0.5, density=True, label="Référence")
-            ax.hist(prod_data[col].dropna(), bins=30, alpha=0.5, density=True, label="Production")
+            ax.hist(ref_values[col], bins=30, alpha=0.5, density=True, label="Référence")
+            ax.hist(prod_values[col], bins=30, alpha=0.5, density=True, label="Production")
 
             status = "DRIFT" if drift_results[col]["drift_detected"] else "OK"
             p_val = drift_results[col]["p_value"]
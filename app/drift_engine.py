@@ -0,0 +1,228 @@
+"""
+Moteur de drift vectorisé : toutes les features en quelques opérations numpy
+
+- KS : la production est triée colonne par colonne en une fois et comparée
+  à la référence déjà triée du profil (ECDF précalculée) : plus aucun
+  re-tri de la référence, deux searchsorted par colonne.
+- Chi2 : les comptes de production de toutes les features catégorielles
+  entières sont obtenus avec un seul bincount (une plage de codes par feature).
+
+Les blocs de colonnes sont répartis sur plusieurs threads (numpy relâche le
+GIL pendant les tris) quand le schéma est large.
+"""
+
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+from scipy.stats import chi2_contingency
+
+from app.drift_stats import ks_pvalues
+
+# En dessous de N colonnes par thread, le découpage coûte plus qu'il ne rapporte
+MIN_COLUMNS_PER_JOB = 8
+# Plus grand code catégoriel compté par bincount (au-delà : np.unique)
+MAX_BINCOUNT_CODE = 1 << 16
+
+
+def resolve_n_jobs(n_columns: int, n_jobs: int = 0) -> int:
+    """
+    n_jobs <= 0 : automatique (un thread par bloc de MIN_COLUMNS_PER_JOB colonnes)
+    """
+    if n_jobs <= 0:
+        n_jobs = min(os.cpu_count() or 1, math.ceil(n_columns / MIN_COLUMNS_PER_JOB))
+    return max(1, min(n_jobs, n_columns))
+
+
+def _column_blocks(n_columns: int, n_jobs: int) -> List[slice]:
+    bounds = np.linspace(0, n_columns, n_jobs + 1).round().astype(int)
+    return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _map_blocks(fn, n_columns: int, n_jobs: int) -> list:
+    blocks = _column_blocks(n_columns, n_jobs)
+    if len(blocks) <= 1:
+        return [fn(block) for block in blocks]
+    with ThreadPoolExecutor(max_workers=len(blocks), thread_name_prefix="drift-engine") as pool:
+        return list(pool.map(fn, blocks))
+
+
+# =========================
+# KS EN LOT
+# =========================
+def ks_statistics(ref_profiles: Sequence, prod: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Statistiques D de ks_2samp pour chaque colonne de `prod` (n2, k).
+
+    `ref_profiles` : ContinuousProfile de chaque colonne (référence triée,
+    support et ECDF précalculés). Le tri de la production, les comptes sans
+    NaN et les fins de groupes d'ex aequo sont calculés en lot sur la
+    matrice ; il ne reste par colonne que deux searchsorted sur des
+    séquences triées. Retourne (D, n2 par colonne, production triée).
+    """
+    prod_sorted = np.sort(prod, axis=0)
+    n2c = np.count_nonzero(~np.isnan(prod_sorted), axis=0)
+    # Dernier élément de chaque groupe de valeurs égales (ECDF side="right")
+    last_of_group = np.ones(prod_sorted.shape, dtype=bool, order="F")
+    last_of_group[:-1] = prod_sorted[1:] != prod_sorted[:-1]
+
+    d = np.empty(prod_sorted.shape[1], dtype=np.float64)
+    for j, ref in enumerate(ref_profiles):
+        n1, n2 = ref.sorted_values.shape[0], int(n2c[j])
+        if n2 == 0:
+            d[j] = np.nan
+            continue
+        values = prod_sorted[:n2, j]
+        idx = np.flatnonzero(last_of_group[: n2 - 1, j])
+        idx = np.append(idx, n2 - 1)
+
+        # Écart des ECDF aux points de production, puis aux points de référence
+        diffs = np.concatenate([
+            np.searchsorted(ref.sorted_values, values[idx], side="right") / n1 - (idx + 1) / n2,
+            ref.cdf - np.searchsorted(values, ref.support, side="right") / n2,
+        ])
+        max_s = diffs.max()
+        min_s = np.clip(-diffs.min(), 0, 1)
+        d[j] = min_s if min_s > max_s else max_s
+
+    return d, n2c, prod_sorted
+
+
+# =========================
+# COMPTAGES CATÉGORIELS EN LOT
+# =========================
+def _is_small_int(values: np.ndarray) -> bool:
+    finite = values[~np.isnan(values)]
+    if finite.size == 0:
+        return True
+    return bool(
+        finite.min() >= 0
+        and finite.max() < MAX_BINCOUNT_CODE
+        and np.array_equal(finite, np.floor(finite))
+    )
+
+
+def categorical_counts(prod: np.ndarray) -> List[Dict]:
+    """
+    Comptes par valeur pour chaque colonne de `prod` (n, k), NaN ignorés.
+    Les colonnes à codes entiers >= 0 sont comptées avec un seul bincount.
+    """
+    k = prod.shape[1]
+    counts: List[Dict] = [{} for _ in range(k)]
+
+    small = [j for j in range(k) if _is_small_int(prod[:, j])]
+    if small:
+        block = prod[:, small]
+        widths = np.nan_to_num(np.nanmax(block, axis=0, initial=-1), nan=-1).astype(np.int64) + 1
+        offsets = np.concatenate([[0], np.cumsum(widths)[:-1]])
+        valid = ~np.isnan(block)
+        codes = (np.where(valid, block, 0).astype(np.int64) + offsets)[valid]
+        flat = np.bincount(codes, minlength=int(widths.sum()))
+        for i, j in enumerate(small):
+            col_counts = flat[offsets[i]: offsets[i] + widths[i]]
+            nonzero = np.flatnonzero(col_counts)
+            counts[j] = dict(zip(nonzero.tolist(), col_counts[nonzero].tolist()))
+
+    for j in range(k):
+        if j in small:
+            continue
+        column = prod[:, j]
+        uniques, n = np.unique(column[~np.isnan(column)], return_counts=True)
+        counts[j] = dict(zip(uniques.tolist(), n.tolist()))
+
+    return counts
+
+
+def chi2_from_counts(ref_counts: Dict, prod_counts: Dict):
+    """
+    (chi2, p-value) sur la table de contingence alignée des deux comptages
+    """
+    all_values = set(ref_counts) | set(prod_counts)
+    contingency_table = np.array([
+        [ref_counts.get(v, 0) for v in all_values],
+        [prod_counts.get(v, 0) for v in all_values],
+    ])
+    chi2, p_value, _, _ = chi2_contingency(contingency_table)
+    return chi2, p_value
+
+
+# =========================
+# MOTEUR
+# =========================
+def compute_drift(
+    profile,
+    continuous_features: Sequence[str],
+    continuous_matrix: np.ndarray,
+    categorical_features: Sequence[str],
+    categorical_matrix: np.ndarray,
+    threshold: float = 0.05,
+    n_jobs: int = 0,
+    categorical_extra: Dict[str, Dict] | None = None,
+):
+    """
+    Tests KS / chi2 de toutes les features en lot.
+
+    `categorical_matrix` ne contient que les features catégorielles
+    numériques ; les comptes des autres (texte) sont passés déjà calculés
+    dans `categorical_extra`.
+
+    Retourne (résultats par feature hors moyennes/écarts-types, valeurs de
+    production triées sans NaN par feature continue).
+    """
+    results: Dict[str, Dict] = {}
+    prod_values: Dict[str, np.ndarray] = {}
+
+    # -------- Continues
+    if continuous_features:
+        ref_profiles = [profile.continuous[col] for col in continuous_features]
+
+        def ks_block(block: slice):
+            return ks_statistics(ref_profiles[block], continuous_matrix[:, block])
+
+        n_jobs_cont = resolve_n_jobs(len(continuous_features), n_jobs)
+        blocks = _map_blocks(ks_block, len(continuous_features), n_jobs_cont)
+        d = np.concatenate([block[0] for block in blocks])
+        n2c = np.concatenate([block[1] for block in blocks])
+        n1c = np.array([len(ref.sorted_values) for ref in ref_profiles])
+        prod_columns = [block[2][:, i] for block in blocks for i in range(block[2].shape[1])]
+        statistics, p_values = ks_pvalues(d, n1c, n2c)
+
+        for j, col in enumerate(continuous_features):
+            if n2c[j] == 0:
+                continue
+            results[col] = {
+                "p_value": float(p_values[j]),
+                "statistic": float(statistics[j]),
+                "drift_detected": bool(p_values[j] < threshold),
+                "type": "continuous",
+            }
+            prod_values[col] = prod_columns[j][: int(n2c[j])]
+
+    # -------- Catégorielles
+    if categorical_features:
+        categorical_extra = categorical_extra or {}
+        numeric_features = [col for col in categorical_features if col not in categorical_extra]
+        blocks = _map_blocks(
+            lambda block: categorical_counts(categorical_matrix[:, block]),
+            len(numeric_features),
+            resolve_n_jobs(len(numeric_features), n_jobs) if numeric_features else 1,
+        )
+        counts_by_feature = dict(zip(numeric_features, [counts for block in blocks for counts in block]))
+        counts_by_feature.update(categorical_extra)
+
+        for col in categorical_features:
+            prod_counts = counts_by_feature[col]
+            try:
+                chi2, p_value = chi2_from_counts(profile.categorical[col], prod_counts)
+            except Exception:
+                continue
+            results[col] = {
+                "p_value": float(p_value),
+                "chi2": float(chi2),
+                "drift_detected": bool(p_value < threshold),
+                "type": "categorical",
+            }
+
+    return results, prod_values
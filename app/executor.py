@@ -0,0 +1,203 @@
+"""
+Exécuteur dédié au scoring, séparé du threadpool AnyIO des requêtes
+
+- backend "thread" : pool de threads de taille fixe (INFERENCE_THREADS)
+- backend "process" : les gros lots sont découpés et scorés en parallèle
+  par un pool de processus ; chaque processus mappe la forêt compilée
+  exportée par app.shared_model (aucun modèle n'est sérialisé par tâche)
+
+Le nombre de tâches en attente est borné : au-delà, submit() lève
+InferenceQueueFull au lieu d'empiler de la latence.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from app.compiled_model import CompiledForest
+from app.inference import predict_churn_proba
+from app.metrics import INFERENCE_QUEUE_DEPTH, INFERENCE_QUEUE_WAIT, INFERENCE_REJECTED
+from app.shared_model import DEFAULT_ROOT as DEFAULT_MMAP_ROOT, export_dir, is_exported, load_shared
+
+BACKENDS = ("thread", "process")
+
+
+class InferenceQueueFull(RuntimeError):
+    pass
+
+
+# =========================
+# CÔTÉ PROCESSUS DU POOL
+# =========================
+_forests: Dict[str, CompiledForest] = {}
+
+
+def _score_in_process(export_path: str, X: np.ndarray, chunk_size: int) -> np.ndarray:
+    # Forêt mappée une fois par processus et par export (les pages sont partagées)
+    forest = _forests.get(export_path)
+    if forest is None:
+        forest = _forests[export_path] = CompiledForest.load(export_path, mmap=True)
+    return predict_churn_proba(forest, X, chunk_size=chunk_size)
+
+
+# =========================
+# EXÉCUTEUR
+# =========================
+class InferenceExecutor:
+    def __init__(
+        self,
+        backend: str = "thread",
+        threads: int = 2,
+        processes: int = 0,
+        max_queue: int = 256,
+        process_min_rows: int = 50000,
+        chunk_size: int = 4096,
+        mmap_root: str = DEFAULT_MMAP_ROOT,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend d'inférence inconnu: {backend}")
+        self.backend = backend
+        self.threads = max(1, threads)
+        self.processes = max(1, processes or os.cpu_count() or 1) if backend == "process" else 0
+        self.max_queue = max(1, max_queue)
+        self.process_min_rows = max(1, process_min_rows)
+        self.chunk_size = chunk_size
+        self.mmap_root = mmap_root
+
+        self._threads = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="inference")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._processes_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+        self.process_batches = 0
+        self._exported = set()
+
+    # -------- API
+    def submit(self, handle, X: np.ndarray) -> Future:
+        """
+        Probabilités de churn de X avec le modèle du handle (Future)
+        """
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                INFERENCE_REJECTED.inc(backend=self.backend)
+                raise InferenceQueueFull(f"Inference queue full ({self.pending} pending)")
+            self.pending += 1
+            INFERENCE_QUEUE_DEPTH.set(self.pending - self.running, backend=self.backend)
+
+        use_processes = self.backend == "process" and X.shape[0] >= self.process_min_rows
+        fn = self._score_processes if use_processes else self._score_threads
+        # Future à nous : annulable tant que la tâche n'a pas démarré, et
+        # `running` n'est compté que pour les tâches réellement démarrées
+        future = Future()
+        future.add_done_callback(self._done)
+        try:
+            self._threads.submit(self._run, future, fn, handle, X, time.perf_counter())
+        except RuntimeError:
+            # Exécuteur arrêté : la place réservée est rendue
+            future.cancel()
+            raise
+        return future
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "threads": self.threads,
+                "processes": self.processes,
+                "max_queue": self.max_queue,
+                "process_min_rows": self.process_min_rows,
+                "queue_depth": self.pending - self.running,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+                "process_batches": self.process_batches,
+            }
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False)
+        with self._processes_lock:
+            if self._processes is not None:
+                self._processes.shutdown(wait=False, cancel_futures=True)
+                self._processes = None
+
+    # -------- Exécution
+    def _run(self, future: Future, fn, handle, X: np.ndarray, submitted_at: float):
+        if not future.set_running_or_notify_cancel():
+            # Annulée avant de démarrer : déjà décomptée par _done
+            return
+        INFERENCE_QUEUE_WAIT.observe(time.perf_counter() - submitted_at, backend=self.backend)
+        with self._lock:
+            self.running += 1
+            INFERENCE_QUEUE_DEPTH.set(self.pending - self.running, backend=self.backend)
+        try:
+            result = fn(handle, X)
+        except BaseException as e:
+            self._finish()
+            future.set_exception(e)
+        else:
+            self._finish()
+            future.set_result(result)
+
+    def _finish(self):
+        # Avant set_result / set_exception : _done voit running déjà à jour
+        with self._lock:
+            self.running -= 1
+
+    def _done(self, future: Future):
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is None:
+                self.completed += 1
+            else:
+                self.failed += 1
+            INFERENCE_QUEUE_DEPTH.set(self.pending - self.running, backend=self.backend)
+
+    def _score_threads(self, handle, X: np.ndarray) -> np.ndarray:
+        return predict_churn_proba(handle.model, X, chunk_size=self.chunk_size)
+
+    def _score_processes(self, handle, X: np.ndarray) -> np.ndarray:
+        path = str(self._export(handle))
+        pool = self._process_pool()
+        parts = np.array_split(X, min(self.processes, X.shape[0]))
+        futures = [pool.submit(_score_in_process, path, part, self.chunk_size) for part in parts]
+        with self._lock:
+            self.process_batches += 1
+        return np.concatenate([f.result() for f in futures])
+
+    def _export(self, handle) -> Path:
+        # Export partagé du modèle actif (déjà présent avec MODEL_ENGINE=mmap) ;
+        # refait s'il a été supprimé par prune_exports
+        if handle.fingerprint not in self._exported or not is_exported(self.mmap_root, handle.fingerprint):
+            def build():
+                model = handle.model
+                return model if isinstance(model, CompiledForest) else CompiledForest.from_sklearn(model)
+
+            load_shared(handle.fingerprint, build, self.mmap_root)
+            self._exported.add(handle.fingerprint)
+        return export_dir(self.mmap_root, handle.fingerprint)
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        with self._processes_lock:
+            if self._processes is None:
+                # spawn : pas de fork d'un processus qui a déjà des threads
+                self._processes = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._processes
@@ -0,0 +1,154 @@
+"""
+Cache des graphiques de drift adressé par contenu
+
+Clé = empreintes des fichiers de référence et de production + seuil +
+liste des features. Un contrôle identique réutilise les PNG déjà dessinés.
+Chaque entrée est un dossier <racine>/<clé>/ ; les entrées les plus
+anciennes (dernier accès) sont supprimées au-delà d'un âge ou d'une taille.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+FIGURE_FILES = ("drift_distributions.png", "drift_heatmap.png")
+# À incrémenter si le rendu change (même données => autre image)
+RENDER_VERSION = 1
+
+
+def figure_key(reference_digest: str, production_digest: str, threshold: float, features: Sequence[str]) -> str:
+    payload = json.dumps({
+        "reference": reference_digest,
+        "production": production_digest,
+        "threshold": float(threshold),
+        "features": list(features),
+        "version": RENDER_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def _copy_atomic(src: Path, dst: Path):
+    # Copie (pas de lien physique : un savefig sur dst ne doit pas modifier le cache)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class FigureCache:
+    """
+    Graphiques rendus, indexés par figure_key, avec éviction par âge et taille
+    """
+
+    def __init__(self, root, max_bytes: int = 256 * 1024 * 1024, max_age_seconds: float = 7 * 24 * 3600):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def lookup(self, key: str) -> Optional[Path]:
+        entry = self.entry_dir(key)
+        if not all((entry / name).is_file() for name in FIGURE_FILES):
+            return None
+        if time.time() - entry.stat().st_mtime > self.max_age_seconds:
+            return None
+        # Dernier accès = mtime du dossier (sert à l'éviction)
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return entry
+
+    def get_or_render(self, key: str, render_fn: Callable[[Path], None]) -> Tuple[Path, bool]:
+        """
+        (dossier de l'entrée, trouvé en cache). render_fn(dossier) dessine
+        les FIGURE_FILES ; le dossier n'est publié qu'une fois complet.
+        """
+        with self._lock:
+            entry = self.lookup(key)
+            if entry is not None:
+                self.hits += 1
+                return entry, True
+            self.misses += 1
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=self.root))
+        try:
+            os.chmod(tmp_dir, 0o755)
+            render_fn(tmp_dir)
+            entry = self.entry_dir(key)
+            with self._lock:
+                if entry.exists():
+                    # Entrée expirée, ou rendue entre-temps par un autre contrôle
+                    shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp_dir, entry)
+                self._evict(keep=key)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        return entry, False
+
+    def publish(self, entry: Path, output_dir: Path) -> Dict[str, str]:
+        """
+        Copie des figures d'une entrée vers output_dir,
+        aux noms historiques drift_distributions.png / drift_heatmap.png
+        """
+        output_dir = Path(output_dir)
+        paths = {}
+        for name in FIGURE_FILES:
+            src = entry / name
+            if src.is_file():
+                _copy_atomic(src, output_dir / name)
+                paths[name] = str(src)
+        return paths
+
+    def _entries(self):
+        if not self.root.exists():
+            return []
+        entries = []
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name.startswith("."):
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+            entries.append((entry.stat().st_mtime, size, entry))
+        return sorted(entries, key=lambda e: e[0])
+
+    def _evict(self, keep: Optional[str] = None):
+        now = time.time()
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+
+        for accessed, size, entry in entries:
+            if entry.name == keep:
+                continue
+            if now - accessed > self.max_age_seconds or total > self.max_bytes:
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "max_age_seconds": self.max_age_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
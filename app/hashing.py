@@ -0,0 +1,39 @@
+"""
+Empreinte sha256 des fichiers, mémorisée par processus
+
+Partagée par le cache des jeux de données (app/dataset_cache.py) et celui
+des graphiques de drift (app/figure_cache.py).
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+_digests: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path, block_size: int = 1 << 20) -> str:
+    """
+    sha256 du contenu, recalculé seulement si mtime / taille changent
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = str(path)
+
+    with _digests_lock:
+        cached = _digests.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            sha.update(block)
+    digest = sha.hexdigest()
+
+    with _digests_lock:
+        _digests[key] = (signature, digest)
+    return digest
@@ -0,0 +1,179 @@
+"""
+Exécution des contrôles de drift en tâches de fond
+
+Les contrôles tournent dans un pool de threads dédié (séparé du threadpool
+des requêtes) ; un contrôle identique déjà en attente ou en cours est
+réutilisé au lieu d'être relancé. Le nombre de contrôles en attente ou en
+cours est borné : au-delà, submit() lève DriftQueueFull.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class DriftQueueFull(Exception):
+    pass
+
+
+class DriftJob:
+    def __init__(self, key: Hashable, params: Dict):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.params = params
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result = None
+        self.error: Optional[str] = None
+        self.future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> Dict:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.finished_at is not None and self.started_at is not None:
+            data["duration_seconds"] = round(self.finished_at - self.started_at, 3)
+        if self.status == SUCCEEDED:
+            data["result"] = self.result
+        if self.status == FAILED:
+            data["error"] = self.error
+        return data
+
+
+def _lower_thread_priority(nice: int):
+    """
+    Sous Linux la priorité (nice) s'applique au thread appelant seul :
+    les contrôles de drift cèdent le CPU aux threads de scoring
+    """
+    if nice <= 0:
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), nice)
+    except (AttributeError, OSError):
+        pass
+
+
+class DriftJobManager:
+    """
+    File de contrôles de drift avec déduplication des contrôles identiques en vol
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 1,
+        max_history: int = 100,
+        nice: int = 0,
+        max_pending: int = 4,
+        on_change: Optional[Callable[[int], None]] = None,
+    ):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="drift-job",
+            initializer=_lower_thread_priority,
+            initargs=(nice,),
+        )
+        self._jobs: "OrderedDict[str, DriftJob]" = OrderedDict()
+        self._in_flight: Dict[Hashable, DriftJob] = {}
+        self._lock = threading.Lock()
+        self.max_history = max_history
+        # Contrôles en attente ou en cours (dédupliqués) au-delà desquels on refuse
+        self.max_pending = max(1, max_pending)
+        # on_change(pending) appelé à chaque soumission / fin de contrôle
+        self.on_change = on_change
+        self.rejected = 0
+
+    def submit(self, key: Hashable, params: Dict, fn: Callable[[], Dict]) -> Tuple[DriftJob, bool]:
+        """
+        Retourne (job, créé). Si un job de même clé est en attente ou en cours,
+        c'est lui qui est retourné.
+        """
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                return existing, False
+            if len(self._in_flight) >= self.max_pending:
+                self.rejected += 1
+                raise DriftQueueFull(f"Drift job queue full ({self.max_pending} pending)")
+
+            job = DriftJob(key, params)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            self._trim_history()
+            job.future = self._executor.submit(self._run, job, fn)
+            self._notify()
+            return job, True
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._in_flight)
+
+    def get(self, job_id: str) -> Optional[DriftJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {
+                "jobs": counts,
+                "in_flight": len(self._in_flight),
+                "max_pending": self.max_pending,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job: DriftJob, fn: Callable[[], Dict]):
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = fn()
+            job.status = SUCCEEDED
+            return job.result
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+            raise
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+                self._notify()
+
+    def _notify(self):
+        # Appelé sous verrou : les mises à jour arrivent dans l'ordre
+        if self.on_change is not None:
+            self.on_change(len(self._in_flight))
+
+    def _trim_history(self):
+        # Oublie les jobs terminés les plus anciens au-delà de max_history
+        excess = len(self._jobs) - self.max_history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.done][:excess]:
+            del self._jobs[job_id]
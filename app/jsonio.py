@@ -0,0 +1,35 @@
+"""
+Encodage / décodage JSON rapide
+
+orjson si installé (sérialise directement les tableaux NumPy, sans
+passer par des listes Python), sinon repli sur le module json standard.
+"""
+
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optionnel : même résultat, plus lent
+    orjson = None
+
+
+def _numpy_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_numpy_default, separators=(",", ":")).encode("utf-8")
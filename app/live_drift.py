@@ -0,0 +1,254 @@
+"""
+Drift sur le trafic réel de /predict, à partir de résumés en mémoire constante
+
+Chaque feature continue est résumée par un histogramme dont les bornes sont
+des quantiles de la référence (au plus `max_bins` bornes) : mémoire fixe,
+fusion par simple addition des comptes, et ECDF de la référence connue
+exactement sur ces bornes. Les features catégorielles sont de simples
+compteurs (chi2 identique à detect_drift).
+
+KS approché : les écarts d'ECDF ne sont connus qu'aux bornes, donc
+`statistic` est une borne basse du D exact (égale à D quand les valeurs de
+production tombent sur le support de la référence, non sous-échantillonné).
+`statistic_upper_bound` borne D par le haut (chaque ECDF reste entre ses
+valeurs aux deux bornes d'un intervalle) et `p_value_lower_bound` est la
+p-value associée : une décision est sûre quand les deux p-values sont du
+même côté du seuil. `drift_detected` se fonde sur la borne basse (pas de
+fausse alerte due au résumé). p-values asymptotiques (kstwo), comme
+detect_drift.
+"""
+
+import bisect
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Sequence
+
+import numpy as np
+from scipy.stats import chi2_contingency
+
+from app.drift_stats import ks_pvalue
+from app.reference_profile import ReferenceProfile
+
+DEFAULT_MAX_BINS = 2048
+
+
+class QuantileSketch:
+    """
+    Histogramme sur des bornes fixes (quantiles de la référence).
+    counts[i] = nombre de valeurs dans ]edges[i-1], edges[i]], le dernier
+    compte tout ce qui dépasse edges[-1].
+    """
+
+    def __init__(self, edges: np.ndarray):
+        self.edges = edges
+        self._edges_list = edges.tolist()
+        self.counts = np.zeros(len(edges) + 1, dtype=np.int64)
+        self.n = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.counts += np.bincount(
+            np.searchsorted(self.edges, values, side="left"),
+            minlength=len(self.counts),
+        )
+        self.n += int(values.size)
+        self.total += float(values.sum())
+        self.total_sq += float(np.square(values).sum())
+
+    def add(self, value: float):
+        """
+        Chemin rapide pour une seule valeur (/predict) : bisect, sans numpy
+        """
+        if math.isnan(value):
+            return
+        self.counts[bisect.bisect_left(self._edges_list, value)] += 1
+        self.n += 1
+        self.total += value
+        self.total_sq += value * value
+
+    def merge(self, other: "QuantileSketch"):
+        self.counts += other.counts
+        self.n += other.n
+        self.total += other.total
+        self.total_sq += other.total_sq
+
+    def cdf_at_edges(self) -> np.ndarray:
+        return np.cumsum(self.counts[:-1]) / self.n
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else 0.0
+
+    @property
+    def std(self) -> float:
+        # écart-type échantillon (ddof=1), comme pandas
+        if self.n < 2:
+            return 0.0
+        var = (self.total_sq - self.n * self.mean ** 2) / (self.n - 1)
+        return float(np.sqrt(max(var, 0.0)))
+
+
+def ks_bounds(ref_cdf: np.ndarray, prod_cdf: np.ndarray, full_support: bool = False):
+    """
+    (borne basse, borne haute) du D de KS à partir des deux ECDF connues aux
+    mêmes bornes. Entre deux bornes, chaque ECDF reste entre ses valeurs aux
+    extrémités (0 avant la première, 1 après la dernière) ; si les bornes
+    sont tout le support de la référence, son ECDF y est même constante.
+    """
+    diffs = ref_cdf - prod_cdf
+    lower = float(max(diffs.max(), np.clip(-diffs.min(), 0, 1)))
+    ref = np.concatenate(([0.0], ref_cdf, [1.0]))
+    prod = np.concatenate(([0.0], prod_cdf, [1.0]))
+    if full_support:
+        upper = np.abs(ref[:-1] - prod[1:]).max()
+    else:
+        upper = max((ref[1:] - prod[:-1]).max(), (prod[1:] - ref[:-1]).max())
+    return lower, min(max(float(upper), lower), 1.0)
+
+
+def _reference_edges(support: np.ndarray, cdf: np.ndarray, max_bins: int):
+    """
+    Bornes = support de la référence, sous-échantillonné en quantiles si trop grand
+    """
+    if len(support) <= max_bins:
+        return support.copy(), cdf.copy()
+    idx = np.unique(np.linspace(0, len(support) - 1, max_bins).round().astype(np.int64))
+    return support[idx], cdf[idx]
+
+
+class LiveDriftMonitor:
+    """
+    Résumés par feature des entrées scorées, comparés au profil de référence
+    """
+
+    def __init__(self, profile: ReferenceProfile, feature_columns: Sequence[str], max_bins: int = DEFAULT_MAX_BINS):
+        self.profile = profile
+        self.feature_columns = list(feature_columns)
+        self._lock = threading.Lock()
+
+        self.ref_cdf: Dict[str, np.ndarray] = {}
+        self.full_support: Dict[str, bool] = {}
+        self.sketches: Dict[str, QuantileSketch] = {}
+        self.counters: Dict[str, Counter] = {}
+
+        for col in self.feature_columns:
+            if col in profile.continuous:
+                ref = profile.continuous[col]
+                edges, cdf = _reference_edges(ref.support, ref.cdf, max_bins)
+                self.sketches[col] = QuantileSketch(edges)
+                self.ref_cdf[col] = cdf
+                self.full_support[col] = len(edges) == len(ref.support)
+            elif col in profile.categorical:
+                self.counters[col] = Counter()
+
+        self._col_index = {col: i for i, col in enumerate(self.feature_columns)}
+
+    @property
+    def n_samples(self) -> int:
+        counts = [s.n for s in self.sketches.values()] + [sum(c.values()) for c in self.counters.values()]
+        return max(counts) if counts else 0
+
+    # -------- Mise à jour (chemin de prédiction)
+    def update(self, X: np.ndarray):
+        """
+        Ajoute une matrice (n, features) dans l'ordre feature_columns
+        """
+        if X.shape[0] == 1:
+            self._update_row(X[0].tolist())
+            return
+
+        with self._lock:
+            for col, sketch in self.sketches.items():
+                sketch.update(X[:, self._col_index[col]])
+            for col, counter in self.counters.items():
+                uniques, counts = np.unique(X[:, self._col_index[col]], return_counts=True)
+                counter.update(dict(zip(uniques.tolist(), counts.tolist())))
+
+    def _update_row(self, row: List[float]):
+        with self._lock:
+            for col, sketch in self.sketches.items():
+                sketch.add(row[self._col_index[col]])
+            for col, counter in self.counters.items():
+                counter[row[self._col_index[col]]] += 1
+
+    def merge(self, other: "LiveDriftMonitor"):
+        with self._lock:
+            for col, sketch in self.sketches.items():
+                sketch.merge(other.sketches[col])
+            for col, counter in self.counters.items():
+                counter.update(other.counters[col])
+
+    def reset(self):
+        with self._lock:
+            for sketch in self.sketches.values():
+                sketch.counts[:] = 0
+                sketch.n = 0
+                sketch.total = sketch.total_sq = 0.0
+            for counter in self.counters.values():
+                counter.clear()
+
+    # -------- Tests de drift
+    def check(self, threshold: float = 0.05) -> Dict:
+        """
+        Même format de résultat que detect_drift, sans relire de CSV
+        """
+        results = {}
+        with self._lock:
+            for col, sketch in self.sketches.items():
+                if sketch.n == 0:
+                    continue
+                ref = self.profile.continuous[col]
+                lower, upper = ks_bounds(self.ref_cdf[col], sketch.cdf_at_edges(), self.full_support[col])
+                statistic, p_value = ks_pvalue(lower, len(ref.sorted_values), sketch.n)
+                _, p_value_lower = ks_pvalue(upper, len(ref.sorted_values), sketch.n)
+
+                results[col] = {
+                    "p_value": float(p_value),
+                    "statistic": float(statistic),
+                    "statistic_upper_bound": upper,
+                    "p_value_lower_bound": p_value_lower,
+                    "drift_detected": bool(p_value < threshold),
+                    "type": "continuous",
+                    "ref_mean": ref.mean,
+                    "prod_mean": sketch.mean,
+                    "ref_std": ref.std,
+                    "prod_std": sketch.std,
+                    "samples": sketch.n,
+                }
+
+            for col, counter in self.counters.items():
+                if not counter:
+                    continue
+                ref_counts = self.profile.categorical[col]
+                all_values = set(ref_counts) | set(counter)
+                contingency_table = np.array([
+                    [ref_counts.get(v, 0) for v in all_values],
+                    [counter.get(v, 0) for v in all_values],
+                ])
+                try:
+                    chi2, p_value, _, _ = chi2_contingency(contingency_table)
+                except ValueError:
+                    continue
+
+                results[col] = {
+                    "p_value": float(p_value),
+                    "chi2": float(chi2),
+                    "drift_detected": bool(p_value < threshold),
+                    "type": "categorical",
+                    "samples": int(sum(counter.values())),
+                }
+
+        return results
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "samples": self.n_samples,
+                "continuous_features": {col: len(s.edges) for col, s in self.sketches.items()},
+                "categorical_features": list(self.counters),
+            }
@@ -1,19 +1,72 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List
-import joblib
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import numpy as np
+import pandas as pd
 import logging
 import os
 import json
 import glob
+import hmac
+import time
 import traceback
 from pathlib import Path
 
 from opencensus.ext.azure.log_exporter import AzureLogHandler
 
 from app.models import CustomerFeatures, PredictionResponse, HealthResponse
-from app.drift_detect import detect_drift
+from app.drift_detect import OUTPUT_DIR, detect_drift
+from app.figure_cache import FigureCache
+from app.reference_profile import file_signature, get_reference_profile
+from app.jobs import DriftJobManager, DriftQueueFull
+from app.live_drift import LiveDriftMonitor
+from app.inference import (
+    FEATURE_COLUMNS,
+    N_FEATURES,
+    features_to_matrix,
+    features_to_row,
+    predict_churn_proba,
+)
+from app.cache import PredictionCache
+from app.bulk import (
+    BulkFormatError, BulkMediaTypeError, BulkTooLarge, BulkValidationError, RowLimit,
+    read_matrix, validate_matrix, write_predictions,
+)
+from app import jsonio
+from app.streaming import NDJSONScoringResponse, score_lines
+from app.batching import MicroBatcher
+from app.executor import InferenceExecutor, InferenceQueueFull
+from app.shared_model import prune_exports
+from app.admission import QUEUE_FULL, AdmissionController, AdmissionMiddleware, EndpointLimiter
+from app.model_registry import (
+    ModelHandle,
+    ModelManager,
+    ModelWatcher,
+    RegistryUnavailable,
+    file_probe,
+    load_from_file,
+    load_from_registry,
+    registry_probe,
+    require_mlflow,
+)
+from app.metrics import (
+    BATCH_SIZE,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    DRIFT_DURATION,
+    DRIFT_RUNS,
+    MODEL_LOAD_SECONDS,
+    MODEL_LOADED,
+    PREDICTIONS,
+    MetricsMiddleware,
+    observe_validation,
+    registry as metrics_registry,
+    stage,
+)
+from app.telemetry import HandlerSink, TelemetryPipeline, build_sinks, install_pipeline, parse_sample_rates
 
 # ============================================================
 # LOGGING & APPLICATION INSIGHTS
@@ -22,10 +75,29 @@ from app.drift_detect import detect_drift
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("bank-churn-api")
 
+# Télémétrie via une file bornée vidée par lots en tâche de fond :
+# - TELEMETRY_SINKS : "console", "stdout" (JSON lines), "file:<chemin>", "none"
+# - TELEMETRY_SAMPLE_RATES : ex. "prediction=0.1" (WARNING/ERROR jamais échantillonnés)
+TELEMETRY_SINKS = os.getenv("TELEMETRY_SINKS", "console")
+TELEMETRY_SAMPLE_RATES = parse_sample_rates(os.getenv("TELEMETRY_SAMPLE_RATES", "prediction=1.0"))
+TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", "10000"))
+TELEMETRY_BATCH_SIZE = int(os.getenv("TELEMETRY_BATCH_SIZE", "256"))
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL", "1.0"))
+
 APPINSIGHTS_CONN = os.getenv("APPLICATIONINSIGHTS_CONNECTION_STRING")
+telemetry_sinks = build_sinks(TELEMETRY_SINKS)
+if APPINSIGHTS_CONN:
+    telemetry_sinks.append(HandlerSink(AzureLogHandler(connection_string=APPINSIGHTS_CONN)))
+
+telemetry = install_pipeline(logger, TelemetryPipeline(
+    telemetry_sinks,
+    queue_size=TELEMETRY_QUEUE_SIZE,
+    batch_size=TELEMETRY_BATCH_SIZE,
+    flush_interval=TELEMETRY_FLUSH_INTERVAL,
+    sample_rates=TELEMETRY_SAMPLE_RATES,
+))
+
 if APPINSIGHTS_CONN:
-    handler = AzureLogHandler(connection_string=APPINSIGHTS_CONN)
-    logger.addHandler(handler)
     logger.info("app_startup", extra={
         "custom_dimensions": {
             "event_type": "startup",
@@ -51,31 +123,228 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# ============================================================
+# ADMISSION CONTROL
+# ============================================================
+
+# Requêtes en cours / en file par endpoint ; au-delà : 429 (file pleine)
+# ou 503 (attente > ADMISSION_QUEUE_TIMEOUT_SECONDS), avec Retry-After
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "1.0"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1"))
+PREDICT_MAX_CONCURRENCY = int(os.getenv("PREDICT_MAX_CONCURRENCY", "64"))
+PREDICT_MAX_QUEUE = int(os.getenv("PREDICT_MAX_QUEUE", "256"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+BATCH_MAX_QUEUE = int(os.getenv("BATCH_MAX_QUEUE", "32"))
+# Drift : priorité basse, délesté dès que des prédictions sont en file
+DRIFT_MAX_CONCURRENCY = int(os.getenv("DRIFT_MAX_CONCURRENCY", "2"))
+DRIFT_MAX_QUEUE = int(os.getenv("DRIFT_MAX_QUEUE", "4"))
+
+
+def admission_limiter(endpoint: str, max_concurrency: int, max_queue: int, priority: int) -> EndpointLimiter:
+    return EndpointLimiter(
+        endpoint,
+        max_concurrency=max_concurrency,
+        max_queue=max_queue,
+        queue_timeout=ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        retry_after=ADMISSION_RETRY_AFTER_SECONDS,
+        priority=priority,
+    )
+
+
+drift_limiter = admission_limiter("/drift/check", DRIFT_MAX_CONCURRENCY, DRIFT_MAX_QUEUE, priority=0)
+admission = AdmissionController([
+    ("POST", admission_limiter("/predict", PREDICT_MAX_CONCURRENCY, PREDICT_MAX_QUEUE, priority=2)),
+    ("POST", admission_limiter("/predict/batch", BATCH_MAX_CONCURRENCY, BATCH_MAX_QUEUE, priority=1)),
+    ("POST", drift_limiter),
+])
+if ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Latence totale par route et statut, exposée sur /metrics
+app.add_middleware(MetricsMiddleware)
 
 
 
 MODEL_PATH = os.getenv("MODEL_PATH", "model/churn_model.pkl")
-model = None
+# "sklearn" (predict_proba natif), "compiled" (forêt aplatie en tableaux NumPy)
+# ou "mmap" (forêt aplatie mappée en lecture seule, une copie pour tous les workers)
+MODEL_ENGINE = os.getenv("MODEL_ENGINE", "sklearn").lower()
+MODEL_MMAP_DIR = os.getenv("MODEL_MMAP_DIR", "model/shared")
+
+# Source du modèle : "file" (MODEL_PATH) ou "registry" (registre MLflow de train_model.py)
+MODEL_SOURCE = os.getenv("MODEL_SOURCE", "file").lower()
+MODEL_REGISTRY_NAME = os.getenv("MODEL_REGISTRY_NAME", "bank-churn-classifier")
+MODEL_REGISTRY_VERSION = os.getenv("MODEL_REGISTRY_VERSION", "latest")
+MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "./mlruns")
+# Rechargement automatique si la source change (0 = seulement via /admin/model/reload)
+MODEL_WATCH_INTERVAL_SECONDS = float(os.getenv("MODEL_WATCH_INTERVAL_SECONDS", "0"))
+# Lignes du fichier de référence utilisées pour préchauffer un nouveau modèle
+MODEL_WARMUP_ROWS = int(os.getenv("MODEL_WARMUP_ROWS", "32"))
+# Jeton exigé (en-tête X-Admin-Token) par les endpoints /admin ; non défini => /admin désactivé
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Seuls les fichiers de ce dossier peuvent être chargés via /admin/model/reload?source=file
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.dirname(MODEL_PATH) or ".")
+
+model_manager = ModelManager()
+model_watcher = None
+model_reload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-reload")
+
+# Taille max d'un appel /predict/batch et taille des blocs passés à predict_proba
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+BATCH_CHUNK_SIZE = int(os.getenv("BATCH_CHUNK_SIZE", "4096"))
+
+# Exécuteur dédié au scoring : "thread" ou "process" (gros lots répartis sur plusieurs coeurs)
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "thread").lower()
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_PROCESSES = int(os.getenv("INFERENCE_PROCESSES", "0"))  # 0 = un par coeur
+# Tâches de scoring en attente au-delà desquelles les requêtes sont refusées (503)
+INFERENCE_MAX_QUEUE = int(os.getenv("INFERENCE_MAX_QUEUE", "256"))
+# Lignes à partir desquelles un lot part dans le pool de processus
+INFERENCE_PROCESS_MIN_ROWS = int(os.getenv("INFERENCE_PROCESS_MIN_ROWS", "50000"))
+RETRY_AFTER_HEADERS = {"Retry-After": str(ADMISSION_RETRY_AFTER_SECONDS)}
+inference = InferenceExecutor(
+    backend=INFERENCE_BACKEND,
+    threads=INFERENCE_THREADS,
+    processes=INFERENCE_PROCESSES,
+    max_queue=INFERENCE_MAX_QUEUE,
+    process_min_rows=INFERENCE_PROCESS_MIN_ROWS,
+    chunk_size=BATCH_CHUNK_SIZE,
+    mmap_root=MODEL_MMAP_DIR,
+)
+
+# Micro-batching opt-in des requêtes /predict concurrentes
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+MICROBATCH_MAX_WAIT_US = int(os.getenv("MICROBATCH_MAX_WAIT_US", "2000"))
+MICROBATCH_MAX_BATCH = int(os.getenv("MICROBATCH_MAX_BATCH", "64"))
+batcher = None
+
+# Nombre max de lignes d'un corps /predict/bulk (CSV, .npy ou Arrow)
+MAX_BULK_ROWS = int(os.getenv("MAX_BULK_ROWS", "1000000"))
+# Taille max d'un corps /predict/bulk : seule limite à la réception pour Arrow et JSON
+MAX_BULK_BODY_MB = int(os.getenv("MAX_BULK_BODY_MB", "512"))
+
+# Nombre de lignes NDJSON scorées à la fois par /predict/stream
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+
+# Cache LRU/TTL des prédictions (désactivable avec PREDICTION_CACHE_ENABLED=false)
+PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PREDICTION_CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "100000"))
+PREDICTION_CACHE_MAX_MB = float(os.getenv("PREDICTION_CACHE_MAX_MB", "64"))
+PREDICTION_CACHE_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "3600"))
+prediction_cache = (
+    PredictionCache(
+        max_entries=PREDICTION_CACHE_MAX_ENTRIES,
+        max_bytes=int(PREDICTION_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=PREDICTION_CACHE_TTL_SECONDS,
+        n_features=N_FEATURES,
+    )
+    if PREDICTION_CACHE_ENABLED
+    else None
+)
+
+
+def resolve_model_file(version: str) -> str:
+    """
+    Nom de fichier demandé, résolu dans MODEL_DIR (joblib.load exécute le
+    pickle : aucun chemin hors de ce dossier n'est accepté)
+    """
+    model_dir = Path(MODEL_DIR).resolve()
+    path = (model_dir / version).resolve()
+    if not path.is_relative_to(model_dir) or not path.is_file():
+        raise ValueError(f"Unknown model file: {version}")
+    return str(path)
+
+
+def model_loader(source: str = None, version: str = None):
+    """
+    Fonction de chargement pour la source configurée (ou demandée)
+    """
+    source = (source or MODEL_SOURCE).lower()
+    if source == "registry":
+        require_mlflow()
+        version = version or MODEL_REGISTRY_VERSION
+        return lambda: load_from_registry(MODEL_REGISTRY_NAME, version, MLFLOW_TRACKING_URI, MODEL_ENGINE, MODEL_MMAP_DIR)
+    if source == "file":
+        path = resolve_model_file(version) if version else MODEL_PATH
+        return lambda: load_from_file(path, MODEL_ENGINE, MODEL_MMAP_DIR)
+    raise ValueError(f"Unknown model source: {source}")
+
+
+def on_model_swap(handle: ModelHandle, previous):
+    global batcher
+    # Le cache ne sert plus que les prédictions du nouveau modèle
+    if prediction_cache is not None:
+        prediction_cache.set_model_fingerprint(handle.fingerprint)
+    MODEL_LOAD_SECONDS.set(handle.load_seconds, engine=handle.engine)
+    MODEL_LOADED.set(1)
+
+    # Nouveau micro-batcher lié au nouveau modèle ; l'ancien finit sa file
+    old_batcher = batcher
+    batcher = None
+    start_microbatcher()
+    if old_batcher is not None:
+        old_batcher.stop()
+
+    prune_model_exports(handle, previous)
+
+    logger.info("model_loaded", extra={
+        "custom_dimensions": {
+            "event_type": "model_load",
+            "model_version": handle.version,
+            "previous_version": previous.version if previous else None,
+            "source": handle.source,
+            "engine": handle.engine,
+            "load_seconds": round(handle.load_seconds, 3),
+            "status": "success"
+        }
+    })
+
+
+def prune_model_exports(handle: ModelHandle, previous):
+    """
+    Exports mappables des anciens modèles (hors actif et précédent) supprimés
+    """
+    try:
+        removed = prune_exports(MODEL_MMAP_DIR, {handle.fingerprint, previous.fingerprint if previous else None})
+    except OSError as e:
+        logger.warning("model_export_prune_failed", extra={
+            "custom_dimensions": {"event_type": "model_load", "error": str(e)}
+        })
+        return
+    if removed:
+        logger.info("model_exports_pruned", extra={
+            "custom_dimensions": {"event_type": "model_load", "removed": removed}
+        })
+
+
+model_manager.on_swap(on_model_swap)
 
 
 @app.on_event("startup")
 async def load_model():
-    global model
+    global model_watcher
+    if MODEL_SOURCE == "registry":
+        # Échec immédiat et explicite plutôt qu'un ModuleNotFoundError au premier rechargement
+        try:
+            require_mlflow()
+        except RegistryUnavailable as e:
+            logger.error("model_load_failed", extra={
+                "custom_dimensions": {
+                    "event_type": "model_load",
+                    "error": str(e)
+                }
+            })
+            raise
+    model_manager.warmup_rows = load_warmup_rows()
     try:
-        model = joblib.load(MODEL_PATH)
-        logger.info("model_loaded", extra={
-            "custom_dimensions": {
-                "event_type": "model_load",
-                "model_path": MODEL_PATH,
-                "status": "success"
-            }
-        })
+        await run_in_threadpool(model_manager.reload, model_loader(), "startup")
     except Exception as e:
         logger.error("model_load_failed", extra={
             "custom_dimensions": {
@@ -83,7 +352,62 @@ async def load_model():
                 "error": str(e)
             }
         })
-        model = None
+        MODEL_LOADED.set(0)
+
+    if MODEL_WATCH_INTERVAL_SECONDS > 0:
+        if MODEL_SOURCE == "registry":
+            probe = registry_probe(MODEL_REGISTRY_NAME, MODEL_REGISTRY_VERSION, MLFLOW_TRACKING_URI)
+        else:
+            probe = file_probe(MODEL_PATH)
+        model_watcher = ModelWatcher(model_manager, probe, model_loader(), MODEL_WATCH_INTERVAL_SECONDS)
+        model_watcher.start()
+
+
+def load_warmup_rows() -> np.ndarray:
+    try:
+        ref = pd.read_csv(REFERENCE_FILE, usecols=FEATURE_COLUMNS, nrows=MODEL_WARMUP_ROWS)
+        return np.ascontiguousarray(ref[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+    except Exception:
+        return np.zeros((1, N_FEATURES), dtype=np.float64)
+
+
+def start_microbatcher():
+    global batcher
+    handle = model_manager.active
+    if not MICROBATCH_ENABLED or handle is None or batcher is not None:
+        return
+
+    new_batcher = MicroBatcher(
+        predict_fn=lambda X: predict_churn_proba(handle.model, X, chunk_size=BATCH_CHUNK_SIZE),
+        n_features=N_FEATURES,
+        max_wait_us=MICROBATCH_MAX_WAIT_US,
+        max_batch=MICROBATCH_MAX_BATCH,
+    )
+    # Modèle servi par ce batcher (comparé au handle de la requête)
+    new_batcher.handle = handle
+    new_batcher.start()
+    batcher = new_batcher
+    logger.info("microbatcher_started", extra={
+        "custom_dimensions": {
+            "event_type": "microbatcher",
+            "max_wait_us": MICROBATCH_MAX_WAIT_US,
+            "max_batch": MICROBATCH_MAX_BATCH
+        }
+    })
+
+
+@app.on_event("shutdown")
+def stop_microbatcher():
+    global batcher
+    if model_watcher is not None:
+        model_watcher.stop()
+    if batcher is not None:
+        batcher.stop()
+        batcher = None
+    drift_jobs.shutdown()
+    inference.shutdown()
+    model_reload_executor.shutdown(wait=False)
+    telemetry.stop()
 
 
 # ============================================================
@@ -102,9 +426,87 @@ def root():
 
 @app.get("/health", response_model=HealthResponse)
 def health():
-    if model is None:
+    handle = model_manager.active
+    if handle is None:
         raise HTTPException(status_code=503, detail="Model not loaded")
-    return {"status": "healthy", "model_loaded": True}
+    return {"status": "healthy", "model_loaded": True, "model_version": handle.version}
+
+
+# ============================================================
+# ADMIN : RECHARGEMENT DU MODÈLE
+# ============================================================
+
+def check_admin_token(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints disabled (ADMIN_TOKEN not set)")
+    token = request.headers.get("x-admin-token", "")
+    if not hmac.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/admin/model/reload", status_code=202)
+async def reload_model(
+    request: Request,
+    source: Optional[str] = None,
+    version: Optional[str] = None,
+    wait: bool = False,
+):
+    """
+    Charge une nouvelle version en tâche de fond, la préchauffe puis
+    l'active d'un coup ; les requêtes en cours finissent sur l'ancienne.
+    source : "file" ou "registry" ; version : nom de fichier dans MODEL_DIR
+    (file) ou version / stage du registre (défaut : configuration MODEL_*).
+    """
+    check_admin_token(request)
+    if model_manager.reloading is not None:
+        raise HTTPException(status_code=409, detail="A model reload is already running")
+
+    try:
+        loader = model_loader(source, version)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RegistryUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+
+    future = model_reload_executor.submit(run_model_reload, loader, "admin")
+
+    if not wait:
+        return {"status": "accepted", "status_url": "/admin/model"}
+
+    try:
+        result = await asyncio.wrap_future(future)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model reload failed: {e}")
+    return JSONResponse(status_code=200, content=result)
+
+
+def run_model_reload(loader, reason: str) -> dict:
+    try:
+        return model_manager.reload(loader, reason)
+    except Exception as e:
+        # L'ancien modèle reste actif
+        logger.error("model_reload_failed", extra={
+            "custom_dimensions": {
+                "event_type": "model_load",
+                "reason": reason,
+                "error": str(e)
+            }
+        })
+        raise
+
+
+@app.get("/admin/model")
+def model_status(request: Request):
+    check_admin_token(request)
+    status = model_manager.status()
+    # Chaque worker uvicorn a son propre gestionnaire de modèle
+    status["worker_pid"] = os.getpid()
+    status["watcher"] = {
+        "enabled": model_watcher is not None,
+        "interval_seconds": MODEL_WATCH_INTERVAL_SECONDS,
+        "errors": model_watcher.errors if model_watcher is not None else 0,
+    }
+    return status
 
 
 # ============================================================
@@ -112,46 +514,57 @@ def health():
 # ============================================================
 
 @app.post("/predict", response_model=PredictionResponse)
-def predict(features: CustomerFeatures):
+async def predict(features: CustomerFeatures):
+    observe_validation("/predict")
 
-    if model is None:
+    # Modèle lu une seule fois : la requête finit dessus même s'il est remplacé entre-temps
+    handle = model_manager.active
+    if handle is None:
         raise HTTPException(status_code=503, detail="Model unavailable")
 
     try:
-        input_data = np.array([[  
-            features.CreditScore,
-            features.Age,
-            features.Tenure,
-            features.Balance,
-            features.NumOfProducts,
-            features.HasCrCard,
-            features.IsActiveMember,
-            features.EstimatedSalary,
-            features.Geography_Germany,
-            features.Geography_Spain
-        ]])
-
-        proba = float(model.predict_proba(input_data)[0][1])
+        with stage("/predict", "features"):
+            row = features_to_row(features)
+            cache_key = prediction_cache.key(row, handle.fingerprint) if prediction_cache is not None else None
+            proba = prediction_cache.get(cache_key) if cache_key is not None else None
+
+        if proba is None:
+            with stage("/predict", "predict_proba"):
+                current_batcher = batcher
+                if current_batcher is not None and current_batcher.handle is handle:
+                    proba = float(await asyncio.wrap_future(current_batcher.submit(row)))
+                else:
+                    input_data = features_to_matrix([features])
+                    proba = float((await asyncio.wrap_future(inference.submit(handle, input_data)))[0])
+            if cache_key is not None:
+                prediction_cache.put(cache_key, proba)
+        with stage("/predict", "live_drift"):
+            record_live_inputs(np.array([row], dtype=np.float64))
         prediction = int(proba > 0.5)
+        PREDICTIONS.inc(endpoint="/predict")
 
         risk = "Low" if proba < 0.3 else "Medium" if proba < 0.7 else "High"
 
-        logger.info("prediction", extra={
-            "custom_dimensions": {
-                "event_type": "prediction",
-                "endpoint": "/predict",
-                "probability": proba,
-                "prediction": prediction,
-                "risk_level": risk
-            }
-        })
+        with stage("/predict", "logging"):
+            logger.info("prediction", extra={
+                "custom_dimensions": {
+                    "event_type": "prediction",
+                    "endpoint": "/predict",
+                    "probability": proba,
+                    "prediction": prediction,
+                    "risk_level": risk
+                }
+            })
 
         return {
             "churn_probability": round(proba, 4),
             "prediction": prediction,
-            "risk_level": risk
+            "risk_level": risk,
+            "model_version": handle.version
         }
 
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=RETRY_AFTER_HEADERS)
     except Exception as e:
         logger.error("prediction_error", extra={
             "custom_dimensions": {
@@ -161,36 +574,60 @@ def predict(features: CustomerFeatures):
         })
         raise HTTPException(status_code=500, detail=str(e))
 @app.post("/predict/batch")
-def predict_batch(features_list: List[CustomerFeatures]):
+async def predict_batch(features_list: List[CustomerFeatures]):
+    observe_validation("/predict/batch")
 
-    if model is None:
+    handle = model_manager.active
+    if handle is None:
         raise HTTPException(status_code=503, detail="Model unavailable")
 
+    if len(features_list) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(features_list)} > {MAX_BATCH_SIZE}"
+        )
+
     try:
-        predictions = []
-
-        for features in features_list:
-            input_data = np.array([[  
-                features.CreditScore,
-                features.Age,
-                features.Tenure,
-                features.Balance,
-                features.NumOfProducts,
-                features.HasCrCard,
-                features.IsActiveMember,
-                features.EstimatedSalary,
-                features.Geography_Germany,
-                features.Geography_Spain
-            ]])
-
-            proba = float(model.predict_proba(input_data)[0][1])
-            prediction = int(proba > 0.5)
-
-            predictions.append({
-                "churn_probability": round(proba, 4),
-                "prediction": prediction
-            })
+        # Travail par ligne (matrice, cache, encodage) dans le threadpool :
+        # seule l'attente de l'inférence reste sur la boucle d'événements
+        input_data = await run_in_threadpool(build_batch_matrix, features_list)
+        with stage("/predict/batch", "predict_proba"):
+            probas = await score_with_cache(input_data, handle)
+        response_body = await run_in_threadpool(finish_batch, input_data, probas, handle)
+        return Response(content=response_body, media_type="application/json")
+
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=RETRY_AFTER_HEADERS)
+    except Exception as e:
+        logger.error("batch_prediction_error", extra={
+            "custom_dimensions": {
+                "event_type": "batch_prediction_error",
+                "error": str(e)
+            }
+        })
+        raise HTTPException(status_code=500, detail=str(e))
 
+def build_batch_matrix(features_list: List[CustomerFeatures]) -> np.ndarray:
+    # Une seule matrice contiguë, scorée par blocs de BATCH_CHUNK_SIZE lignes
+    with stage("/predict/batch", "features"):
+        return features_to_matrix(features_list)
+
+
+def finish_batch(input_data: np.ndarray, probas: np.ndarray, handle: ModelHandle) -> bytes:
+    with stage("/predict/batch", "live_drift"):
+        record_live_inputs(input_data)
+
+    predictions = [
+        {
+            "churn_probability": round(proba, 4),
+            "prediction": int(proba > 0.5)
+        }
+        for proba in probas.tolist()
+    ]
+    BATCH_SIZE.observe(len(predictions), endpoint="/predict/batch")
+    PREDICTIONS.inc(len(predictions), endpoint="/predict/batch")
+
+    with stage("/predict/batch", "logging"):
         logger.info("batch_prediction", extra={
             "custom_dimensions": {
                 "event_type": "batch_prediction",
@@ -198,20 +635,192 @@ def predict_batch(features_list: List[CustomerFeatures]):
             }
         })
 
-        return {
-            "predictions": predictions,
-            "count": len(predictions)
-        }
+    # Encodage direct (orjson) : pas de jsonable_encoder sur chaque dict
+    return jsonio.dumps({
+        "predictions": predictions,
+        "count": len(predictions),
+        "model_version": handle.version
+    })
+
 
+@app.post("/predict/bulk")
+async def predict_bulk(request: Request):
+
+    handle = model_manager.active
+    if handle is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+
+    content_type = request.headers.get("content-type", "")
+
+    try:
+        body = await read_bulk_body(request, content_type)
+        input_data = await run_in_threadpool(decode_bulk_body, body, content_type)
+        with stage("/predict/bulk", "predict_proba"):
+            probas = await asyncio.wrap_future(inference.submit(handle, input_data))
+        response_body, media_type = await run_in_threadpool(finish_bulk, input_data, probas, content_type)
+    except InferenceQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=RETRY_AFTER_HEADERS)
+    except BulkTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except BulkMediaTypeError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except BulkFormatError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BulkValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error("batch_prediction_error", extra={
+        logger.error("bulk_prediction_error", extra={
             "custom_dimensions": {
-                "event_type": "batch_prediction_error",
+                "event_type": "bulk_prediction_error",
                 "error": str(e)
             }
         })
         raise HTTPException(status_code=500, detail=str(e))
 
+    return Response(content=response_body, media_type=media_type, headers={"X-Model-Version": handle.version})
+
+
+async def read_bulk_body(request: Request, content_type: str) -> bytes:
+    """
+    Lit le corps par morceaux : refus (413) sans attendre la fin dès que
+    MAX_BULK_ROWS (CSV / .npy) ou MAX_BULK_BODY_MB (tous formats) est dépassé
+    """
+    limit = RowLimit(content_type, MAX_BULK_ROWS, max_bytes=MAX_BULK_BODY_MB * 1024 * 1024)
+    body = bytearray()
+    async for chunk in request.stream():
+        limit.feed(chunk)
+        body += chunk
+    return bytes(body)
+
+
+def decode_bulk_body(body: bytes, content_type: str) -> np.ndarray:
+    """
+    Décodage et validation vectorisée d'un corps /predict/bulk
+    """
+    with stage("/predict/bulk", "features"):
+        input_data = read_matrix(body, content_type, max_rows=MAX_BULK_ROWS)
+    with stage("/predict/bulk", "validation"):
+        validate_matrix(input_data)
+    return input_data
+
+
+def finish_bulk(input_data: np.ndarray, probas: np.ndarray, content_type: str):
+    record_live_inputs(input_data)
+    BATCH_SIZE.observe(input_data.shape[0], endpoint="/predict/bulk")
+    PREDICTIONS.inc(input_data.shape[0], endpoint="/predict/bulk")
+
+    logger.info("bulk_prediction", extra={
+        "custom_dimensions": {
+            "event_type": "bulk_prediction",
+            "count": int(input_data.shape[0]),
+            "format": content_type
+        }
+    })
+    return write_predictions(probas, content_type)
+
+
+@app.post("/predict/stream")
+async def predict_stream():
+
+    handle = model_manager.active
+    if handle is None:
+        raise HTTPException(status_code=503, detail="Model unavailable")
+
+    def predict_fn(X):
+        record_live_inputs(X)
+        BATCH_SIZE.observe(X.shape[0], endpoint="/predict/stream")
+        with stage("/predict/stream", "predict_proba"):
+            return inference.submit(handle, X).result()
+
+    def score_chunk(lines):
+        return score_lines(lines, predict_fn)
+
+    def log_stream(count: int):
+        PREDICTIONS.inc(count, endpoint="/predict/stream")
+        logger.info("stream_prediction", extra={
+            "custom_dimensions": {
+                "event_type": "stream_prediction",
+                "count": count
+            }
+        })
+
+    response = NDJSONScoringResponse(score_chunk, STREAM_CHUNK_SIZE, on_complete=log_stream)
+    response.headers["X-Model-Version"] = handle.version
+    return response
+
+
+async def score_with_cache(input_data: np.ndarray, handle: ModelHandle) -> np.ndarray:
+    """
+    Probabilités de churn pour une matrice, en ne scorant que les lignes absentes du cache.
+    Clés et lectures / écritures du cache (une par ligne) dans le threadpool.
+    """
+    if prediction_cache is None:
+        return await asyncio.wrap_future(inference.submit(handle, input_data))
+
+    keys, probas, missing = await run_in_threadpool(lookup_cached, input_data, handle)
+    if missing.size:
+        rows = input_data if missing.size == len(input_data) else input_data[missing]
+        scored = await asyncio.wrap_future(inference.submit(handle, rows))
+        await run_in_threadpool(store_scored, keys, probas, missing, scored)
+    return probas
+
+
+def lookup_cached(input_data: np.ndarray, handle: ModelHandle):
+    """
+    (clés, probabilités connues (0 sinon), indices des lignes à scorer)
+    """
+    keys = [prediction_cache.key(row, handle.fingerprint) for row in input_data.tolist()]
+    cached = prediction_cache.get_many(keys)
+    missing = np.array([i for i, proba in enumerate(cached) if proba is None], dtype=np.int64)
+    probas = np.array([0.0 if proba is None else proba for proba in cached], dtype=np.float64)
+    return keys, probas, missing
+
+
+def store_scored(keys, probas: np.ndarray, missing: np.ndarray, scored: np.ndarray):
+    probas[missing] = scored
+    prediction_cache.put_many([keys[i] for i in missing.tolist()], scored.tolist())
+
+
+@app.get("/predict/cache/stats")
+def prediction_cache_stats():
+    if prediction_cache is None:
+        return {"enabled": False}
+    return prediction_cache.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Format texte Prometheus
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/telemetry/stats")
+def telemetry_stats():
+    return telemetry.stats()
+
+
+@app.get("/admission/stats")
+def admission_stats():
+    # queue_depth : signal de mise à l'échelle (requêtes en attente d'admission)
+    stats = admission.stats()
+    stats["enabled"] = ADMISSION_ENABLED
+    stats["inference_queue_depth"] = inference.stats()["queue_depth"]
+    return stats
+
+
+@app.get("/predict/executor/stats")
+def inference_executor_stats():
+    return inference.stats()
+
+
+@app.get("/predict/microbatch/stats")
+def microbatch_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return batcher.stats()
+
 # ============================================================
 # DRIFT LOGGING TO APPLICATION INSIGHTS
 # ============================================================
@@ -253,25 +862,123 @@ def log_drift_to_insights(drift_results: dict):
 # DRIFT ENDPOINTS
 # ============================================================
 
-@app.post("/drift/check")
-def check_drift(threshold: float = 0.05):
+REFERENCE_FILE = os.getenv("REFERENCE_FILE", "data/bank_churn.csv")
+PRODUCTION_FILE = os.getenv("PRODUCTION_FILE", "data/production_data.csv")
+
+# Contrôles de drift exécutés hors du threadpool des requêtes
+DRIFT_JOB_WORKERS = int(os.getenv("DRIFT_JOB_WORKERS", "1"))
+DRIFT_JOB_HISTORY = int(os.getenv("DRIFT_JOB_HISTORY", "100"))
+# Priorité CPU (nice) des threads de drift, plus basse que celle du scoring
+DRIFT_JOB_NICE = int(os.getenv("DRIFT_JOB_NICE", "10"))
+# Contrôles distincts en attente ou en cours ; au-delà /drift/check répond 429
+DRIFT_JOB_MAX_PENDING = int(os.getenv("DRIFT_JOB_MAX_PENDING", "4"))
+drift_jobs = DriftJobManager(
+    max_workers=DRIFT_JOB_WORKERS,
+    max_history=DRIFT_JOB_HISTORY,
+    nice=DRIFT_JOB_NICE,
+    max_pending=DRIFT_JOB_MAX_PENDING,
+    # Jobs en attente comptés dans la file de /drift/check (/metrics, /admission/stats)
+    on_change=drift_limiter.set_backlog,
+)
+# Threads du moteur de drift par contrôle (0 = automatique selon le nombre de features)
+DRIFT_N_JOBS = int(os.getenv("DRIFT_N_JOBS", "0"))
+# Graphiques dessinés par défaut pendant /drift/check (sinon : render_drift.py)
+DRIFT_RENDER = os.getenv("DRIFT_RENDER", "true").lower() == "true"
+
+# Graphiques réutilisés tant que données, seuil et features sont identiques
+DRIFT_FIGURE_CACHE_DIR = os.getenv("DRIFT_FIGURE_CACHE_DIR", str(OUTPUT_DIR / "figures"))
+DRIFT_FIGURE_CACHE_MAX_MB = int(os.getenv("DRIFT_FIGURE_CACHE_MAX_MB", "256"))
+DRIFT_FIGURE_CACHE_MAX_AGE_HOURS = float(os.getenv("DRIFT_FIGURE_CACHE_MAX_AGE_HOURS", "168"))
+figure_cache = FigureCache(
+    DRIFT_FIGURE_CACHE_DIR,
+    max_bytes=DRIFT_FIGURE_CACHE_MAX_MB * 1024 * 1024,
+    max_age_seconds=DRIFT_FIGURE_CACHE_MAX_AGE_HOURS * 3600,
+)
+
+# Résumés en mémoire constante des features réellement scorées (drift "live")
+LIVE_DRIFT_ENABLED = os.getenv("LIVE_DRIFT_ENABLED", "true").lower() in ("1", "true", "yes")
+LIVE_DRIFT_MAX_BINS = int(os.getenv("LIVE_DRIFT_MAX_BINS", "2048"))
+live_monitor = None
+
+
+def reset_live_monitor(profile):
+    global live_monitor
+    if LIVE_DRIFT_ENABLED:
+        live_monitor = LiveDriftMonitor(profile, FEATURE_COLUMNS, max_bins=LIVE_DRIFT_MAX_BINS)
+
+
+def record_live_inputs(input_data: np.ndarray):
+    monitor = live_monitor
+    if monitor is not None and input_data.shape[0]:
+        monitor.update(input_data)
+
+
+@app.on_event("startup")
+def warm_reference_profile():
+    # Profil de référence (tris, comptages) calculé une fois avant le premier /drift/check
+    try:
+        profile = get_reference_profile(REFERENCE_FILE)
+        reset_live_monitor(profile)
+        logger.info("reference_profile_loaded", extra={
+            "custom_dimensions": {
+                "event_type": "reference_profile",
+                "reference_file": REFERENCE_FILE,
+                "rows": profile.n_rows,
+                "features": len(profile.columns)
+            }
+        })
+    except Exception as e:
+        logger.warning("reference_profile_failed", extra={
+            "custom_dimensions": {
+                "event_type": "reference_profile",
+                "error": str(e)
+            }
+        })
+
+
+@app.post("/drift/reference/refresh")
+def refresh_reference_profile():
+    try:
+        profile = get_reference_profile(REFERENCE_FILE, force_reload=True)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    reset_live_monitor(profile)
+
+    return {
+        "status": "refreshed",
+        "reference_file": REFERENCE_FILE,
+        "rows": profile.n_rows,
+        "continuous_features": list(profile.continuous),
+        "categorical_features": list(profile.categorical)
+    }
+
 
+def run_drift_check(threshold: float, render: bool = True) -> dict:
+    start = time.perf_counter()
     try:
         results = detect_drift(
-            reference_file="data/bank_churn.csv",
-            production_file="data/production_data.csv",
-            threshold=threshold
+            reference_file=REFERENCE_FILE,
+            production_file=PRODUCTION_FILE,
+            threshold=threshold,
+            n_jobs=DRIFT_N_JOBS,
+            render=render,
+            figure_cache=figure_cache,
         )
 
         log_drift_to_insights(results)
+        DRIFT_RUNS.inc(kind="file", status="success")
+        DRIFT_DURATION.observe(time.perf_counter() - start, kind="file")
 
         return {
             "status": "success",
             "features_analyzed": len(results),
-            "features_drifted": sum(1 for r in results.values() if r["drift_detected"])
+            "features_drifted": sum(1 for r in results.values() if r["drift_detected"]),
+            "results": results
         }
 
     except Exception:
+        DRIFT_RUNS.inc(kind="file", status="error")
+        DRIFT_DURATION.observe(time.perf_counter() - start, kind="file")
         tb = traceback.format_exc()
         logger.error("drift_error", extra={
             "custom_dimensions": {
@@ -279,8 +986,106 @@ def check_drift(threshold: float = 0.05):
                 "traceback": tb
             }
         })
+        raise
+
+
+def drift_job_key(threshold: float, render: bool = True):
+    # Même seuil, même rendu et mêmes fichiers (mtime, taille) => même contrôle
+    signatures = []
+    for path in (REFERENCE_FILE, PRODUCTION_FILE):
+        try:
+            signatures.append(file_signature(Path(path)))
+        except OSError:
+            signatures.append(None)
+    return (REFERENCE_FILE, PRODUCTION_FILE, float(threshold), bool(render), *signatures)
+
+
+@app.post("/drift/check", status_code=202)
+async def check_drift(threshold: float = 0.05, wait: bool = False, render: bool = DRIFT_RENDER):
+    """
+    Soumet un contrôle de drift en tâche de fond et renvoie son job_id.
+    wait=true attend le résultat sans occuper de thread du serveur.
+    render=false : rapport JSON seul, graphiques à dessiner avec render_drift.py.
+    """
+    try:
+        job, created = drift_jobs.submit(
+            key=drift_job_key(threshold, render),
+            params={"threshold": threshold, "render": render},
+            fn=lambda: run_drift_check(threshold, render),
+        )
+    except DriftQueueFull as e:
+        drift_limiter.reject(429, QUEUE_FULL)
+        raise HTTPException(status_code=429, detail=str(e), headers=RETRY_AFTER_HEADERS)
+
+    if not wait:
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "deduplicated": not created,
+            "status_url": f"/drift/jobs/{job.id}"
+        }
+
+    try:
+        result = await asyncio.wrap_future(job.future)
+    except Exception:
         raise HTTPException(status_code=500, detail="Drift check failed")
 
+    return JSONResponse(status_code=200, content={
+        "status": result["status"],
+        "job_id": job.id,
+        "features_analyzed": result["features_analyzed"],
+        "features_drifted": result["features_drifted"]
+    })
+
+
+@app.get("/drift/figures/stats")
+def drift_figure_cache_stats():
+    return figure_cache.stats()
+
+
+@app.get("/drift/jobs/{job_id}")
+def drift_job_status(job_id: str):
+    job = drift_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown drift job")
+    return job.to_dict()
+
+
+@app.get("/drift/live")
+def check_live_drift(threshold: float = 0.05):
+    """
+    Drift des entrées scorées depuis le démarrage (ou le dernier reset).
+    KS approché à partir d'histogrammes : `statistic` est une borne basse du
+    D exact, `statistic_upper_bound` une borne haute (voir app/live_drift.py).
+    Pour le D exact, utiliser /drift/check.
+    """
+
+    if live_monitor is None:
+        raise HTTPException(status_code=503, detail="Live drift monitoring unavailable")
+
+    start = time.perf_counter()
+    results = live_monitor.check(threshold=threshold)
+    DRIFT_RUNS.inc(kind="live", status="success" if results else "no_data")
+    DRIFT_DURATION.observe(time.perf_counter() - start, kind="live")
+    if results:
+        log_drift_to_insights(results)
+
+    return {
+        "status": "success" if results else "no_data",
+        "samples": live_monitor.n_samples,
+        "features_analyzed": len(results),
+        "features_drifted": sum(1 for r in results.values() if r["drift_detected"]),
+        "results": results
+    }
+
+
+@app.post("/drift/live/reset")
+def reset_live_drift():
+    if live_monitor is None:
+        raise HTTPException(status_code=503, detail="Live drift monitoring unavailable")
+    live_monitor.reset()
+    return {"status": "reset"}
+
 
 @app.post("/drift/alert")
 def manual_drift_alert(
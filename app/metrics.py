@@ -0,0 +1,332 @@
+"""
+Métriques en mémoire exposées au format texte Prometheus (/metrics)
+
+Compteurs, jauges et histogrammes à buckets fixes, sans dépendance
+externe : une observation = un bisect + un verrou. Les latences par étape
+(validation, assemblage des features, predict_proba, logging) sont
+mesurées dans les endpoints ; la latence totale par un middleware ASGI.
+"""
+
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latences de 100 µs à 10 s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Tailles de lots (lignes par requête)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384, 65536, 262144, 1048576)
+# Durées des contrôles de drift
+DRIFT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.label_names, key)} {_format_value(v)}" for key, v in items
+        ]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # clé de labels -> [comptes par bucket (+Inf en dernier), somme, nombre]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                le = ("le", _format_value(bound))
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, label_names=()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# =========================
+# MÉTRIQUES DE L'API
+# =========================
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.histogram(
+    "churn_http_request_duration_seconds",
+    "Latence totale des requêtes HTTP",
+    ("method", "endpoint", "status"),
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "churn_http_requests_in_flight",
+    "Requêtes HTTP en cours",
+)
+STAGE_LATENCY = registry.histogram(
+    "churn_stage_duration_seconds",
+    "Latence par étape de traitement (validation, features, predict_proba, logging)",
+    ("endpoint", "stage"),
+)
+BATCH_SIZE = registry.histogram(
+    "churn_batch_size_rows",
+    "Nombre de lignes scorées par requête",
+    ("endpoint",),
+    buckets=SIZE_BUCKETS,
+)
+PREDICTIONS = registry.counter(
+    "churn_predictions_total",
+    "Lignes scorées",
+    ("endpoint",),
+)
+MODEL_LOAD_SECONDS = registry.gauge(
+    "churn_model_load_seconds",
+    "Durée du dernier chargement du modèle",
+    ("engine",),
+)
+MODEL_LOADED = registry.gauge(
+    "churn_model_loaded",
+    "1 si un modèle est chargé",
+)
+INFERENCE_QUEUE_DEPTH = registry.gauge(
+    "churn_inference_queue_depth",
+    "Tâches de scoring en attente dans l'exécuteur dédié",
+    ("backend",),
+)
+INFERENCE_QUEUE_WAIT = registry.histogram(
+    "churn_inference_queue_wait_seconds",
+    "Attente d'une tâche de scoring avant son exécution",
+    ("backend",),
+)
+INFERENCE_REJECTED = registry.counter(
+    "churn_inference_rejected_total",
+    "Tâches de scoring refusées (file de l'exécuteur pleine)",
+    ("backend",),
+)
+ADMISSION_IN_FLIGHT = registry.gauge(
+    "churn_admission_in_flight",
+    "Requêtes admises en cours par endpoint limité",
+    ("endpoint",),
+)
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "churn_admission_queue_depth",
+    "Requêtes en attente d'admission par endpoint limité",
+    ("endpoint",),
+)
+ADMISSION_WAIT = registry.histogram(
+    "churn_admission_wait_seconds",
+    "Attente avant admission",
+    ("endpoint",),
+)
+ADMISSION_REJECTED = registry.counter(
+    "churn_admission_rejected_total",
+    "Requêtes délestées (file pleine, attente trop longue, priorité basse)",
+    ("endpoint", "reason"),
+)
+DRIFT_RUNS = registry.counter(
+    "churn_drift_runs_total",
+    "Contrôles de drift exécutés",
+    ("kind", "status"),
+)
+DRIFT_DURATION = registry.histogram(
+    "churn_drift_run_duration_seconds",
+    "Durée des contrôles de drift",
+    ("kind",),
+    buckets=DRIFT_BUCKETS,
+)
+
+
+# =========================
+# ÉTAPES D'UNE REQUÊTE
+# =========================
+# Début de la requête (posé par le middleware, repoussé à l'admission) :
+# l'écart jusqu'à l'entrée dans l'endpoint = lecture du corps + validation pydantic
+_request_start: contextvars.ContextVar = contextvars.ContextVar("request_start", default=None)
+
+
+def mark_admitted():
+    """
+    Appelé par AdmissionMiddleware une fois la place obtenue : l'attente
+    d'admission (mesurée à part) n'est pas comptée dans "validation"
+    """
+    if _request_start.get() is not None:
+        _request_start.set(time.perf_counter())
+
+
+def observe_validation(endpoint: str):
+    """
+    À appeler en entrée d'endpoint : temps depuis l'arrivée de la requête
+    """
+    start = _request_start.get()
+    if start is not None:
+        STAGE_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, stage="validation")
+
+
+def stage(endpoint: str, name: str):
+    return STAGE_LATENCY.time(endpoint=endpoint, stage=name)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI : latence totale par méthode, route (gabarit) et statut
+    """
+
+    def __init__(self, app, skip_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        token = _request_start.set(start)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            _request_start.reset(token)
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                endpoint=getattr(route, "path", "unmatched"),
+                status=status["code"],
+            )
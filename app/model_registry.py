@@ -0,0 +1,289 @@
+"""
+Chargement et rechargement à chaud du modèle (fichier ou registre MLflow)
+
+Le modèle actif est un ModelHandle immuable : chaque requête lit le handle
+une seule fois et termine sur ce modèle, même si un nouveau est activé
+entre-temps. Un rechargement charge, compile éventuellement et préchauffe
+le nouveau modèle en tâche de fond, puis remplace le handle d'un coup.
+"""
+
+import importlib.util
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import joblib
+import numpy as np
+
+from app.compiled_model import CompiledForest
+from app.inference import N_FEATURES, model_fingerprint, predict_churn_proba
+from app.shared_model import DEFAULT_ROOT as DEFAULT_MMAP_ROOT, load_shared
+
+REGISTRY_SCHEME = "models:/"
+
+
+class RegistryUnavailable(RuntimeError):
+    """MODEL_SOURCE=registry sans le paquet mlflow (dépendance optionnelle)"""
+
+
+def require_mlflow():
+    if importlib.util.find_spec("mlflow") is None:
+        raise RegistryUnavailable(
+            "MODEL_SOURCE=registry nécessite le paquet 'mlflow' "
+            "(pip install mlflow, ou image construite avec --build-arg WITH_MLFLOW=true)"
+        )
+
+
+@dataclass(frozen=True)
+class ModelHandle:
+    model: object
+    version: str
+    source: str
+    fingerprint: str
+    engine: str
+    loaded_at: float = field(default_factory=time.time)
+    load_seconds: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "fingerprint": self.fingerprint,
+            "engine": self.engine,
+            "loaded_at": self.loaded_at,
+            "load_seconds": round(self.load_seconds, 3),
+        }
+
+
+# =========================
+# CHARGEMENT
+# =========================
+def _compile(load: Callable[[], object], engine: str, fingerprint: str, mmap_root: str):
+    """
+    engine : "sklearn", "compiled" (forêt aplatie en mémoire) ou "mmap"
+    (forêt aplatie mappée depuis mmap_root, partagée entre workers)
+    """
+    if engine == "mmap":
+        # Export déjà présent : ni chargement du pickle ni compilation
+        return load_shared(fingerprint, lambda: CompiledForest.from_sklearn(load()), mmap_root)
+    if engine == "compiled":
+        return CompiledForest.from_sklearn(load())
+    return load()
+
+
+def load_from_file(path: str, engine: str = "sklearn", mmap_root: str = DEFAULT_MMAP_ROOT) -> ModelHandle:
+    start = time.perf_counter()
+    fingerprint = model_fingerprint(path)
+    model = _compile(lambda: joblib.load(path), engine, fingerprint, mmap_root)
+    return ModelHandle(
+        model=model,
+        version=f"file:{fingerprint}",
+        source=str(path),
+        fingerprint=fingerprint,
+        engine=engine,
+        load_seconds=time.perf_counter() - start,
+    )
+
+
+def resolve_registry_version(name: str, version: str = "latest", tracking_uri: Optional[str] = None) -> str:
+    """
+    Numéro de version concret pour "latest", un stage ("Production") ou un numéro
+    """
+    from mlflow.tracking import MlflowClient  # optionnel : seulement pour le registre
+
+    client = MlflowClient(tracking_uri=tracking_uri)
+    if version.isdigit():
+        return version
+    if version == "latest":
+        versions = client.search_model_versions(f"name='{name}'")
+        if not versions:
+            raise LookupError(f"Aucune version enregistrée pour {name}")
+        return str(max(int(v.version) for v in versions))
+    latest = client.get_latest_versions(name, stages=[version])
+    if not latest:
+        raise LookupError(f"Aucune version de {name} au stage {version}")
+    return str(latest[0].version)
+
+
+def load_from_registry(
+    name: str,
+    version: str = "latest",
+    tracking_uri: Optional[str] = None,
+    engine: str = "sklearn",
+    mmap_root: str = DEFAULT_MMAP_ROOT,
+) -> ModelHandle:
+    import mlflow
+    import mlflow.sklearn
+
+    start = time.perf_counter()
+    if tracking_uri:
+        mlflow.set_tracking_uri(tracking_uri)
+    resolved = resolve_registry_version(name, version, tracking_uri)
+    uri = f"{REGISTRY_SCHEME}{name}/{resolved}"
+    # Version du registre = identité du modèle (clé du cache de prédictions)
+    fingerprint = f"{name}-{resolved}"
+    model = _compile(lambda: mlflow.sklearn.load_model(uri), engine, fingerprint, mmap_root)
+    return ModelHandle(
+        model=model,
+        version=f"{name}/{resolved}",
+        source=uri,
+        fingerprint=fingerprint,
+        engine=engine,
+        load_seconds=time.perf_counter() - start,
+    )
+
+
+def warm_up(handle: ModelHandle, rows: np.ndarray):
+    """
+    Quelques prédictions avant activation : vérifie la forme et les bornes
+    des sorties et paie les coûts de premier appel hors du chemin des requêtes
+    """
+    if rows.size == 0:
+        rows = np.zeros((1, N_FEATURES), dtype=np.float64)
+    for n in (1, len(rows)):
+        probas = predict_churn_proba(handle.model, rows[:n])
+        if probas.shape != (n,) or not np.all((probas >= 0) & (probas <= 1)):
+            raise ValueError(f"Sorties invalides au préchauffage du modèle {handle.version}")
+
+
+# =========================
+# RECHARGEMENT À CHAUD
+# =========================
+class ModelManager:
+    """
+    Modèle actif + rechargements en tâche de fond (un seul à la fois)
+    """
+
+    def __init__(self, warmup_rows: Optional[np.ndarray] = None):
+        self._active: Optional[ModelHandle] = None
+        self._swap_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[ModelHandle, Optional[ModelHandle]], None]] = []
+        self.warmup_rows = warmup_rows if warmup_rows is not None else np.zeros((0, N_FEATURES))
+        self.history: List[Dict] = []
+        self.reloading: Optional[Dict] = None
+
+    @property
+    def active(self) -> Optional[ModelHandle]:
+        return self._active
+
+    def on_swap(self, listener: Callable[[ModelHandle, Optional[ModelHandle]], None]):
+        """
+        listener(nouveau, ancien) appelé juste après chaque activation
+        """
+        self._listeners.append(listener)
+
+    def activate(self, handle: ModelHandle):
+        with self._swap_lock:
+            previous = self._active
+            self._active = handle
+        for listener in self._listeners:
+            listener(handle, previous)
+        return previous
+
+    def deactivate(self):
+        with self._swap_lock:
+            self._active = None
+
+    def reload(self, loader: Callable[[], ModelHandle], reason: str = "manual") -> Dict:
+        """
+        Charge, préchauffe puis active ; l'ancien modèle reste actif en cas d'échec
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            raise RuntimeError("Un rechargement est déjà en cours")
+
+        entry = {"id": uuid.uuid4().hex, "reason": reason, "started_at": time.time(), "status": "running"}
+        self.reloading = entry
+        try:
+            handle = loader()
+            current = self._active
+            if current is not None and current.fingerprint == handle.fingerprint:
+                entry.update(status="unchanged", version=handle.version)
+                return entry
+
+            warm_start = time.perf_counter()
+            warm_up(handle, self.warmup_rows)
+            previous = self.activate(handle)
+            entry.update(
+                status="activated",
+                version=handle.version,
+                previous_version=previous.version if previous else None,
+                load_seconds=round(handle.load_seconds, 3),
+                warmup_seconds=round(time.perf_counter() - warm_start, 3),
+            )
+            return entry
+        except Exception as e:
+            entry.update(status="failed", error=str(e))
+            raise
+        finally:
+            entry["finished_at"] = time.time()
+            self.history = (self.history + [entry])[-20:]
+            self.reloading = None
+            self._reload_lock.release()
+
+    def status(self) -> Dict:
+        active = self._active
+        return {
+            "active": active.to_dict() if active else None,
+            "reloading": self.reloading,
+            "history": list(self.history),
+        }
+
+
+class ModelWatcher:
+    """
+    Surveille une source de modèle et déclenche un rechargement quand elle change :
+    - fichier : mtime / taille
+    - registre MLflow : numéro de la dernière version
+    """
+
+    def __init__(self, manager: ModelManager, probe: Callable[[], object], loader: Callable[[], ModelHandle], interval: float):
+        self.manager = manager
+        self.probe = probe
+        self.loader = loader
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last = None
+        self.errors = 0
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        try:
+            self._last = self.probe()
+        except Exception:
+            self._last = None
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                current = self.probe()
+                if current == self._last:
+                    continue
+                self.manager.reload(self.loader, reason="watcher")
+                self._last = current
+            except Exception:
+                self.errors += 1
+
+
+def file_probe(path: str) -> Callable[[], object]:
+    def probe():
+        stat = Path(path).stat()
+        return stat.st_mtime_ns, stat.st_size
+    return probe
+
+
+def registry_probe(name: str, version: str, tracking_uri: Optional[str]) -> Callable[[], object]:
+    return lambda: resolve_registry_version(name, version, tracking_uri)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class CustomerFeatures(BaseModel):
     """Schema pour les features d'un client"""
@@ -35,8 +35,10 @@ class PredictionResponse(BaseModel):
     churn_probability: float = Field(..., description="Probabilite de churn (0-1)")
     prediction: int = Field(..., description="Prediction binaire (0=reste, 1=part)")
     risk_level: str = Field(..., description="Niveau de risque (Low/Medium/High)")
+    model_version: Optional[str] = Field(None, description="Version du modele ayant score la requete")
 
 class HealthResponse(BaseModel):
     """Schema pour le health check"""
     status: str
-    model_loaded: bool
\ No newline at end of file
+    model_loaded: bool
+    model_version: Optional[str] = None
\ No newline at end of file
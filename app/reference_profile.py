@@ -0,0 +1,120 @@
+"""
+Profil précalculé des données de référence pour la détection de drift
+
+Le fichier de référence (data/bank_churn.csv) est lu, classé et trié une
+seule fois ; le profil est gardé en mémoire et reconstruit seulement si le
+fichier change (mtime ou taille).
+"""
+
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.dataset_cache import read_table
+from app.drift_stats import ecdf_support
+
+# Colonnes numériques avec plus de N valeurs distinctes => continues
+MAX_CATEGORICAL_VALUES = 10
+TARGET_COLUMN = "Exited"
+
+
+@dataclass
+class ContinuousProfile:
+    sorted_values: np.ndarray
+    support: np.ndarray
+    cdf: np.ndarray
+    mean: float
+    std: float
+
+
+@dataclass
+class ReferenceProfile:
+    path: str
+    signature: Tuple[int, int]
+    n_rows: int
+    continuous: Dict[str, ContinuousProfile] = field(default_factory=dict)
+    categorical: Dict[str, Dict] = field(default_factory=dict)
+    # Colonnes continues triées une par une (NaN en fin), stockage colonne par colonne
+    sorted_matrix: np.ndarray = field(default_factory=lambda: np.empty((0, 0)))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.continuous) + list(self.categorical)
+
+
+def file_signature(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def build_reference_profile(ref_data: pd.DataFrame, path: str = "", signature=(0, 0)) -> ReferenceProfile:
+    """
+    Classe les colonnes et précalcule ECDF triées / comptages par catégorie
+    """
+    profile = ReferenceProfile(path=path, signature=signature, n_rows=len(ref_data))
+
+    continuous_columns = []
+    for col in ref_data.columns:
+        if col == TARGET_COLUMN:
+            continue
+        values = ref_data[col]
+        if values.dtype in ["int64", "float64"] and values.nunique() > MAX_CATEGORICAL_VALUES:
+            continuous_columns.append(col)
+        else:
+            profile.categorical[col] = values.value_counts().to_dict()
+
+    # Un seul tri pour toutes les colonnes continues
+    matrix = np.array(ref_data[continuous_columns].to_numpy(dtype=np.float64), order="F")
+    matrix.sort(axis=0)
+    profile.sorted_matrix = matrix
+
+    for j, col in enumerate(continuous_columns):
+        clean = ref_data[col].dropna()
+        sorted_values = matrix[: len(clean), j]
+        support, cdf = ecdf_support(sorted_values)
+        profile.continuous[col] = ContinuousProfile(
+            sorted_values=sorted_values,
+            support=support,
+            cdf=cdf,
+            mean=float(clean.mean()),
+            std=float(clean.std()),
+        )
+
+    return profile
+
+
+# =========================
+# CACHE EN MÉMOIRE
+# =========================
+_profiles: Dict[str, ReferenceProfile] = {}
+_lock = threading.Lock()
+
+
+def get_reference_profile(reference_file, force_reload: bool = False) -> ReferenceProfile:
+    """
+    Profil du fichier de référence, reconstruit si le fichier a changé
+    """
+    reference_file = Path(reference_file)
+    if not reference_file.exists():
+        raise FileNotFoundError(f"Fichier de référence introuvable: {reference_file}")
+
+    key = str(reference_file.resolve())
+    signature = file_signature(reference_file)
+
+    with _lock:
+        profile = _profiles.get(key)
+        if profile is not None and profile.signature == signature and not force_reload:
+            return profile
+
+        profile = build_reference_profile(read_table(reference_file), path=key, signature=signature)
+        _profiles[key] = profile
+        return profile
+
+
+def clear_reference_profiles():
+    with _lock:
+        _profiles.clear()
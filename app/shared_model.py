@@ -0,0 +1,152 @@
+"""
+Modèle partagé entre plusieurs workers uvicorn
+
+La forêt compilée est exportée une fois en .npy dans <racine>/<empreinte>/,
+puis chaque worker la mappe en lecture seule (np.load(mmap_mode="r")) :
+N workers = une seule copie physique des arbres, et le démarrage d'un
+worker se résume à un map (sans joblib.load du pickle). L'export est
+protégé par un verrou fichier : le premier worker exporte, les autres
+attendent puis mappent le même dossier.
+
+Après chaque activation d'un modèle, prune_exports() supprime (sous le même
+verrou) les exports qui ne sont ni l'actif ni le précédent et qu'aucun
+processus ne mappe encore : les rechargements à chaud n'accumulent pas de
+copies.
+
+Exemple (pré-export avant de lancer les workers) :
+    python -m app.shared_model model/churn_model.pkl --root model/shared
+"""
+
+import argparse
+import fcntl
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Set
+
+from app.compiled_model import META_FILE, CompiledForest
+
+DEFAULT_ROOT = "model/shared"
+
+
+def export_dir(root, fingerprint: str) -> Path:
+    return Path(root) / fingerprint
+
+
+def is_exported(root, fingerprint: str) -> bool:
+    return (export_dir(root, fingerprint) / META_FILE).is_file()
+
+
+@contextmanager
+def _export_lock(root: Path):
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def export_forest(forest: CompiledForest, root, fingerprint: str) -> Path:
+    """
+    Écrit la forêt dans un dossier temporaire puis le renomme :
+    un worker ne voit jamais d'export incomplet
+    """
+    root = Path(root)
+    target = export_dir(root, fingerprint)
+    tmp_dir = Path(tempfile.mkdtemp(prefix=f".{fingerprint}.", dir=root))
+    try:
+        forest.save(tmp_dir)
+        os.chmod(tmp_dir, 0o755)
+        os.replace(tmp_dir, target)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    return target
+
+
+def load_shared(fingerprint: str, build: Callable[[], CompiledForest], root=DEFAULT_ROOT) -> CompiledForest:
+    """
+    Forêt mappée pour cette empreinte ; build() (chargement + compilation)
+    n'est appelé que si aucun export n'existe encore
+    """
+    root = Path(root)
+    if not is_exported(root, fingerprint):
+        with _export_lock(root):
+            # Un autre worker a pu exporter pendant l'attente du verrou
+            if not is_exported(root, fingerprint):
+                export_forest(build(), root, fingerprint)
+    return CompiledForest.load(export_dir(root, fingerprint), mmap=True)
+
+
+def _mapped_paths(root: Path) -> Optional[Set[str]]:
+    """
+    Fichiers de root mappés par un processus (/proc/<pid>/maps, Linux) ;
+    None si on ne peut pas le savoir
+    """
+    proc = Path("/proc")
+    if not (proc / "self" / "maps").is_file():
+        return None
+    prefix = str(root.resolve()) + os.sep
+    mapped = set()
+    for maps in proc.glob("[0-9]*/maps"):
+        try:
+            with open(maps, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    index = line.find(prefix)
+                    if index >= 0:
+                        mapped.add(line[index:].rstrip("\n").removesuffix(" (deleted)"))
+        except OSError:
+            # Processus terminé entre-temps, ou d'un autre utilisateur
+            continue
+    return mapped
+
+
+def prune_exports(root, keep: Iterable[str]) -> list:
+    """
+    Supprime les exports hors `keep` (empreintes) qu'aucun processus ne
+    mappe encore, ainsi que les dossiers temporaires d'exports interrompus.
+    Renvoie les empreintes supprimées.
+    """
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    keep = set(keep)
+    removed = []
+    with _export_lock(root):
+        mapped = _mapped_paths(root)
+        if mapped is None:
+            return []
+        for entry in root.iterdir():
+            if not entry.is_dir():
+                continue
+            if entry.name.startswith("."):
+                # Un export en cours tient le verrou : ce dossier est orphelin
+                shutil.rmtree(entry, ignore_errors=True)
+                continue
+            if entry.name in keep:
+                continue
+            prefix = str(entry.resolve()) + os.sep
+            if any(path.startswith(prefix) for path in mapped):
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            removed.append(entry.name)
+    return removed
+
+
+if __name__ == "__main__":
+    import joblib
+
+    from app.inference import model_fingerprint
+
+    parser = argparse.ArgumentParser(description="Exporte le modèle au format mappable partagé par les workers")
+    parser.add_argument("model_path", nargs="?", default=os.getenv("MODEL_PATH", "model/churn_model.pkl"))
+    parser.add_argument("--root", default=os.getenv("MODEL_MMAP_DIR", DEFAULT_ROOT))
+    args = parser.parse_args()
+
+    fingerprint = model_fingerprint(args.model_path)
+    forest = load_shared(fingerprint, lambda: CompiledForest.from_sklearn(joblib.load(args.model_path)), args.root)
+    print(f"Modèle exporté : {export_dir(args.root, fingerprint)} ({forest.n_trees} arbres)")
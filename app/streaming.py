@@ -0,0 +1,168 @@
+"""
+Scoring en flux NDJSON : le corps est lu par morceaux, scoré par blocs de
+taille fixe et les résultats sont renvoyés au fil de l'eau
+"""
+
+import json
+import logging
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+import numpy as np
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.inference import features_to_row, N_FEATURES
+from app.models import CustomerFeatures
+
+NumberedLine = Tuple[int, bytes]
+
+logger = logging.getLogger("bank-churn-api")
+
+
+async def iter_line_chunks(body: AsyncIterator[bytes], chunk_size: int) -> AsyncIterator[List[NumberedLine]]:
+    """
+    Découpe un flux d'octets en blocs d'au plus `chunk_size` lignes non vides.
+    Seuls le bloc courant et une ligne incomplète restent en mémoire ; la
+    ligne incomplète est un bytearray étendu sur place (une ligne très longue
+    reçue en N morceaux coûte O(taille), pas O(taille x N)).
+    """
+    pending = bytearray()
+    chunk: List[NumberedLine] = []
+    line_no = 0
+
+    async for data in body:
+        start = len(pending)
+        pending += data
+        # Seuls les octets reçus à l'instant peuvent contenir un nouveau saut de ligne
+        end = pending.rfind(b"\n", start)
+        if end < 0:
+            continue
+        lines = bytes(pending[:end]).split(b"\n")
+        del pending[: end + 1]
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                chunk.append((line_no, line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+    if pending.strip():
+        chunk.append((line_no + 1, bytes(pending)))
+    if chunk:
+        yield chunk
+
+
+async def iter_request_body(receive: Receive) -> AsyncIterator[bytes]:
+    """
+    Octets du corps de la requête, message ASGI par message ASGI
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+        yield message.get("body", b"")
+        if not message.get("more_body", False):
+            return
+
+
+class NDJSONScoringResponse(Response):
+    """
+    Réponse qui lit elle-même le corps de la requête pendant qu'elle écrit.
+
+    StreamingResponse ne convient pas : pour les serveurs ASGI < 2.4 elle
+    écoute `receive` en parallèle pour détecter la déconnexion et avalerait
+    les morceaux du corps.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(
+        self,
+        score_chunk: Callable[[List[NumberedLine]], str],
+        chunk_size: int,
+        on_complete: Optional[Callable[[int], None]] = None,
+    ):
+        self.score_chunk = score_chunk
+        self.chunk_size = max(1, chunk_size)
+        self.on_complete = on_complete
+        self.status_code = 200
+        self.background = None
+        self.init_headers(None)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        count = 0
+        async for lines in iter_line_chunks(iter_request_body(receive), self.chunk_size):
+            try:
+                results = await run_in_threadpool(self.score_chunk, lines)
+            except Exception as e:
+                # En-têtes déjà envoyés : l'échec du bloc devient une ligne d'erreur
+                # par ligne d'entrée, le flux continue avec le bloc suivant
+                logger.error("stream_chunk_error", extra={
+                    "custom_dimensions": {
+                        "event_type": "stream_chunk_error",
+                        "first_line": lines[0][0],
+                        "last_line": lines[-1][0],
+                        "error": str(e),
+                        "error_type": type(e).__name__,
+                    }
+                })
+                results = error_lines(lines, "scoring_failed", str(e) or type(e).__name__)
+            await send({"type": "http.response.body", "body": results.encode("utf-8"), "more_body": True})
+            count += len(lines)
+
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        if self.on_complete is not None:
+            self.on_complete(count)
+
+
+def error_lines(lines: List[NumberedLine], error_type: str, message: str) -> str:
+    error = [{"type": error_type, "loc": [], "msg": message}]
+    return "".join(json.dumps({"line": line_no, "error": error}) + "\n" for line_no, _ in lines)
+
+
+def line_errors(exc: Exception) -> List[dict]:
+    """
+    Erreurs d'une ligne au format de FastAPI (type, loc, msg), sans l'entrée
+    """
+    if isinstance(exc, ValidationError):
+        return exc.errors(include_url=False, include_context=False, include_input=False)
+    if isinstance(exc, json.JSONDecodeError):
+        return [{"type": "json_invalid", "loc": [], "msg": exc.msg}]
+    return [{"type": "model_type", "loc": [], "msg": "Input should be a JSON object"}]
+
+
+def score_lines(lines: List[NumberedLine], predict_fn: Callable[[np.ndarray], np.ndarray]) -> str:
+    """
+    Valide chaque ligne avec CustomerFeatures, score les lignes valides en un
+    seul appel et renvoie un bloc NDJSON (une ligne de résultat par ligne d'entrée)
+    """
+    rows = np.empty((len(lines), N_FEATURES), dtype=np.float64)
+    valid = []
+    errors = {}
+
+    for i, (line_no, line) in enumerate(lines):
+        try:
+            features = CustomerFeatures(**json.loads(line))
+        except (ValueError, TypeError) as e:
+            errors[i] = line_errors(e)
+            continue
+        rows[len(valid)] = features_to_row(features)
+        valid.append(i)
+
+    probas = predict_fn(rows[: len(valid)]) if valid else np.empty(0)
+    results = [None] * len(lines)
+    for i, proba in zip(valid, probas.tolist()):
+        results[i] = {
+            "line": lines[i][0],
+            "churn_probability": round(proba, 4),
+            "prediction": int(proba > 0.5),
+        }
+    for i, error in errors.items():
+        results[i] = {"line": lines[i][0], "error": error}
+
+    return "".join(json.dumps(result) + "\n" for result in results)
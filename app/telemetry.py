@@ -0,0 +1,252 @@
+"""
+Télémétrie non bloquante : file bornée + worker qui envoie par lots
+
+Les appels logger.info("event", extra={"custom_dimensions": ...}) restent
+inchangés ; le handler installé sur le logger ne fait qu'échantillonner et
+déposer le record dans une file. Un thread de fond vide la file par lots
+vers les sinks (AzureLogHandler, console, fichier JSON lines). File pleine
+=> le record est compté comme perdu, la requête n'attend jamais.
+"""
+
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence
+
+DEFAULT_QUEUE_SIZE = 10000
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+_STOP = object()
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """
+    "prediction=0.1,batch_prediction=0.5" -> {"prediction": 0.1, ...}
+    """
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        event, _, rate = item.partition("=")
+        rates[event.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+# =========================
+# SINKS
+# =========================
+class JsonLinesSink:
+    """
+    Un objet JSON par record (message, niveau, custom_dimensions), écrit par
+    lot sur stdout ou dans un fichier : pratique pour tester hors ligne.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._stream = open(path, "a", encoding="utf-8") if path else sys.stdout
+
+    def write_batch(self, records: Sequence[logging.LogRecord]):
+        lines = []
+        for record in records:
+            lines.append(json.dumps({
+                "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": record.getMessage(),
+                "custom_dimensions": getattr(record, "custom_dimensions", None),
+            }, default=str))
+        self._stream.write("\n".join(lines) + "\n")
+        self._stream.flush()
+
+    def close(self):
+        if self.path:
+            self._stream.close()
+
+
+class HandlerSink:
+    """
+    Adapte un logging.Handler classique (AzureLogHandler, StreamHandler)
+    """
+
+    def __init__(self, handler: logging.Handler):
+        self.handler = handler
+
+    def write_batch(self, records: Sequence[logging.LogRecord]):
+        for record in records:
+            self.handler.handle(record)
+        self.handler.flush()
+
+    def close(self):
+        self.handler.close()
+
+
+def console_sink() -> HandlerSink:
+    # Même rendu que logging.basicConfig ("INFO:bank-churn-api:prediction")
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    return HandlerSink(handler)
+
+
+def build_sinks(spec: str) -> List:
+    """
+    "console", "stdout" (JSON lines), "file:<chemin>" ou "none", séparés par des virgules
+    """
+    sinks = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        if item == "console":
+            sinks.append(console_sink())
+        elif item == "stdout":
+            sinks.append(JsonLinesSink())
+        elif item.startswith("file:"):
+            sinks.append(JsonLinesSink(item[len("file:"):]))
+        elif item != "none":
+            raise ValueError(f"Sink de télémétrie inconnu: {item}")
+    return sinks
+
+
+# =========================
+# PIPELINE
+# =========================
+class TelemetryPipeline(logging.Handler):
+    """
+    Handler de logging : échantillonnage + file bornée, envoi par un worker
+    """
+
+    def __init__(
+        self,
+        sinks: Sequence,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        sample_rates: Optional[Dict[str, float]] = None,
+    ):
+        super().__init__()
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Échantillonnage par nom d'événement ; WARNING et au-delà toujours envoyés
+        self.sample_rates = dict(sample_rates or {})
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._counts_lock = threading.Lock()
+        self.enqueued = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.sent = 0
+        self.batches = 0
+        self.sink_errors = 0
+
+    # -------- Côté requête
+    def emit(self, record: logging.LogRecord):
+        rate = self.sample_rates.get(record.msg) if record.levelno < logging.WARNING else None
+        if rate is not None and rate < 1.0 and random.random() >= rate:
+            with self._counts_lock:
+                self.sampled_out += 1
+            return
+
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._counts_lock:
+                self.dropped += 1
+            return
+        with self._counts_lock:
+            self.enqueued += 1
+
+    # -------- Worker
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Envoie ce qui reste dans la file puis arrête le worker
+        """
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get()
+            except Exception:
+                continue
+            if item is _STOP:
+                return
+
+            # Lot : jusqu'à batch_size records ou flush_interval après le premier
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._send(batch)
+            if stop:
+                return
+
+    def _send(self, batch: List[logging.LogRecord]):
+        for sink in self.sinks:
+            try:
+                sink.write_batch(batch)
+            except Exception:
+                with self._counts_lock:
+                    self.sink_errors += 1
+        with self._counts_lock:
+            self.sent += len(batch)
+            self.batches += 1
+
+    def stats(self) -> Dict:
+        with self._counts_lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "sent": self.sent,
+                "batches": self.batches,
+                "mean_batch_size": round(self.sent / self.batches, 2) if self.batches else 0.0,
+                "sampled_out": self.sampled_out,
+                "dropped_queue_full": self.dropped,
+                "sink_errors": self.sink_errors,
+                "sample_rates": self.sample_rates,
+                "sinks": [type(s).__name__ for s in self.sinks],
+                "running": self._thread is not None,
+            }
+
+
+def install_pipeline(logger: logging.Logger, pipeline: TelemetryPipeline) -> TelemetryPipeline:
+    """
+    Remplace l'envoi synchrone : le logger ne passe plus que par la file
+    """
+    logger.addHandler(pipeline)
+    logger.propagate = False
+    pipeline.start()
+    return pipeline
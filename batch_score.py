@@ -0,0 +1,204 @@
+"""
+Scoring offline en masse d'un fichier CSV/Parquet, sans passer par l'API
+
+Exemple :
+    python batch_score.py data/production_data.csv predictions.csv --workers 4
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.compiled_model import CompiledForest
+from app.inference import FEATURE_COLUMNS, predict_churn_proba
+
+# Modèle chargé une seule fois dans le processus parent ; avec "fork" les
+# workers en héritent en copy-on-write au lieu de le recharger.
+_MODEL = None
+
+
+def load_model(model_path: str, engine: str = "sklearn"):
+    model = joblib.load(model_path)
+    if engine == "compiled":
+        model = CompiledForest.from_sklearn(model)
+    return model
+
+
+def _init_worker(model_path: str, engine: str):
+    global _MODEL
+    if _MODEL is None:
+        _MODEL = load_model(model_path, engine)
+
+
+def _score_chunk(X: np.ndarray) -> np.ndarray:
+    return predict_churn_proba(_MODEL, X, chunk_size=len(X) or 1)
+
+
+# =========================
+# LECTURE PAR BLOCS
+# =========================
+def iter_chunks(input_file: str, chunk_size: int):
+    """
+    Blocs (n, 10) float64 dans l'ordre FEATURE_COLUMNS, sans charger tout le fichier
+    """
+    if input_file.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(input_file)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=FEATURE_COLUMNS):
+            X = np.empty((batch.num_rows, len(FEATURE_COLUMNS)), dtype=np.float64)
+            for i, col in enumerate(FEATURE_COLUMNS):
+                X[:, i] = batch.column(col).to_numpy(zero_copy_only=False)
+            yield X
+        return
+
+    reader = pd.read_csv(
+        input_file,
+        usecols=FEATURE_COLUMNS,
+        dtype={col: np.float64 for col in FEATURE_COLUMNS},
+        chunksize=chunk_size,
+        memory_map=True,
+    )
+    for df in reader:
+        yield np.ascontiguousarray(df[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+
+
+# =========================
+# ÉCRITURE ORDONNÉE
+# =========================
+class PredictionWriter:
+    """
+    Écrit les blocs de résultats dans l'ordre, en CSV ou en Parquet
+    """
+
+    def __init__(self, output_file: str):
+        self.output_file = output_file
+        self.parquet = output_file.endswith(".parquet")
+        self._writer = None
+        self._header = True
+
+    def write(self, probas: np.ndarray):
+        df = pd.DataFrame({
+            "churn_probability": np.round(probas, 4),
+            "prediction": (probas > 0.5).astype(np.int64),
+        })
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.output_file, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.output_file, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+# =========================
+# SCORING PARALLÈLE
+# =========================
+def score_file(
+    input_file: str,
+    output_file: str,
+    model_path: str = "model/churn_model.pkl",
+    engine: str = "sklearn",
+    workers: int = 0,
+    chunk_size: int = 50000,
+) -> dict:
+    global _MODEL
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    _MODEL = load_model(model_path, engine)
+    load_seconds = time.perf_counter() - start
+
+    writer = PredictionWriter(output_file)
+    n_rows = 0
+
+    if workers == 1:
+        for X in iter_chunks(input_file, chunk_size):
+            writer.write(_score_chunk(X))
+            n_rows += len(X)
+    else:
+        fork = "fork" in mp.get_all_start_methods()
+        context = mp.get_context("fork" if fork else "spawn")
+        # Au plus 2 blocs en vol par worker : la mémoire ne dépend pas de la taille du fichier
+        max_in_flight = workers * 2
+        pending = deque()
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=None if fork else _init_worker,
+            initargs=() if fork else (model_path, engine),
+        ) as executor:
+            for X in iter_chunks(input_file, chunk_size):
+                pending.append(executor.submit(_score_chunk, X))
+                n_rows += len(X)
+                while len(pending) >= max_in_flight:
+                    writer.write(pending.popleft().result())
+            while pending:
+                writer.write(pending.popleft().result())
+
+    writer.close()
+    elapsed = time.perf_counter() - start
+    scoring_seconds = elapsed - load_seconds
+
+    return {
+        "rows": n_rows,
+        "workers": workers,
+        "model_load_seconds": round(load_seconds, 3),
+        "scoring_seconds": round(scoring_seconds, 3),
+        "total_seconds": round(elapsed, 3),
+        "rows_per_second": round(n_rows / scoring_seconds, 1) if scoring_seconds > 0 else 0.0,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring offline du churn sur un fichier CSV/Parquet")
+    parser.add_argument("input_file", help="CSV (en-tête de data/bank_churn.csv) ou Parquet")
+    parser.add_argument("output_file", help="Fichier de sortie .csv ou .parquet")
+    parser.add_argument("--model", default=os.getenv("MODEL_PATH", "model/churn_model.pkl"))
+    parser.add_argument("--engine", choices=["sklearn", "compiled"], default=os.getenv("MODEL_ENGINE", "sklearn"))
+    parser.add_argument("--workers", type=int, default=0, help="Nombre de processus (0 = tous les coeurs)")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Lignes par bloc")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if not os.path.exists(args.input_file):
+        print(f"Fichier introuvable : {args.input_file}")
+        sys.exit(1)
+
+    print(f"Scoring de {args.input_file} -> {args.output_file}")
+    stats = score_file(
+        args.input_file,
+        args.output_file,
+        model_path=args.model,
+        engine=args.engine,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+    )
+
+    print("\n" + "=" * 50)
+    print(f"Lignes scorees   : {stats['rows']}")
+    print(f"Workers          : {stats['workers']}")
+    print(f"Chargement modele: {stats['model_load_seconds']}s")
+    print(f"Duree scoring    : {stats['scoring_seconds']}s")
+    print(f"Duree totale     : {stats['total_seconds']}s")
+    print(f"Debit (scoring)  : {stats['rows_per_second']} lignes/s")
+    print("=" * 50)
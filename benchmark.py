@@ -0,0 +1,459 @@
+"""
+Benchmarks reproductibles de l'API et du moteur de drift, hors ligne
+
+L'API est appelée en processus (httpx + transport ASGI sur app.main:app,
+sans réseau) et detect_drift directement. Chaque scénario rapporte le
+débit, les latences p50/p95/p99 et le pic de RSS ; les résultats sont
+enregistrés en JSON pour comparer deux exécutions.
+
+Exemples :
+    python benchmark.py --output bench_avant.json
+    python benchmark.py --output bench_apres.json --compare bench_avant.json
+    python benchmark.py --quick --only predict,batch
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# Configuration de l'API pour des mesures stables (à poser avant d'importer app.main)
+BENCH_ENV = {
+    "TELEMETRY_SINKS": "none",
+    "PREDICTION_CACHE_ENABLED": "false",
+    "MAX_BATCH_SIZE": "100000",
+    "DRIFT_RENDER": "false",
+    "MODEL_WATCH_INTERVAL_SECONDS": "0",
+}
+
+SCENARIOS = ["predict", "batch", "drift", "dataset", "model_load", "cold_start"]
+BATCH_SIZES = [1, 10, 100, 1000, 10000, 100000]
+DRIFT_ROWS = [10_000, 1_000_000, 10_000_000]
+QUICK_BATCH_SIZES = [1, 100, 10000]
+QUICK_DRIFT_ROWS = [10_000, 100_000]
+
+# Chargement d'un CSV dans un processus neuf : temps et pic de RSS mesurés
+# après les imports ; toutes les colonnes sont lues (pages mappées comprises)
+DATASET_LOADER = """
+import json, resource, sys, time
+import pandas as pd
+from app.dataset_cache import read_table
+
+def peak_mb():
+    # VmHWM : propre au processus (ru_maxrss hérite du parent au fork)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+path, mode, cache_dir = sys.argv[1:4]
+before = peak_mb()
+start = time.perf_counter()
+df = pd.read_csv(path) if mode == "csv" else read_table(path, cache_dir=cache_dir)
+df.sum(numeric_only=True)
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_mb(), "import_rss_mb": before}))
+"""
+
+
+# =========================
+# MESURES
+# =========================
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PeakRss:
+    """
+    Pic de RSS pendant un scénario (échantillonné toutes les `interval` s)
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self.peak = rss_mb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_mb())
+
+
+def summarize(name: str, params: dict, latencies, rows_per_call: int = 1, peak_rss: float = 0.0) -> dict:
+    latencies = np.asarray(latencies, dtype=np.float64)
+    total = float(latencies.sum())
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "name": name,
+        "params": params,
+        "iterations": int(latencies.size),
+        "rows_per_call": rows_per_call,
+        "total_seconds": round(total, 4),
+        "calls_per_second": round(latencies.size / total, 2) if total else None,
+        "rows_per_second": round(latencies.size * rows_per_call / total, 1) if total else None,
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "peak_rss_mb": round(peak_rss, 1),
+    }
+
+
+# =========================
+# DONNÉES
+# =========================
+def load_reference(reference_file: str) -> pd.DataFrame:
+    from app.inference import FEATURE_COLUMNS
+    return pd.read_csv(reference_file, usecols=FEATURE_COLUMNS)[FEATURE_COLUMNS]
+
+
+def sample_rows(reference: pd.DataFrame, n_rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(reference), size=n_rows)
+    return reference.iloc[idx].reset_index(drop=True)
+
+
+def production_file(reference: pd.DataFrame, n_rows: int, data_dir: Path, seed: int) -> Path:
+    """
+    Fichier de production synthétique (rééchantillonnage + léger décalage
+    de CreditScore et Age), généré une fois par taille et graine
+    """
+    path = data_dir / f"production_{n_rows}_{seed}.csv"
+    if path.exists():
+        return path
+    data_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    tmp = path.with_suffix(".tmp")
+    chunk = 1_000_000
+    for start in range(0, n_rows, chunk):
+        part = sample_rows(reference, min(chunk, n_rows - start), seed + start)
+        part["CreditScore"] = np.clip(part["CreditScore"] + rng.integers(0, 30, len(part)), 300, 850)
+        part["Age"] = np.clip(part["Age"] + rng.integers(0, 5, len(part)), 18, 100)
+        part.to_csv(tmp, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+# =========================
+# SCÉNARIOS API
+# =========================
+async def start_app(app):
+    for handler in app.router.on_startup:
+        result = handler()
+        if inspect.isawaitable(result):
+            await result
+
+
+async def stop_app(app):
+    for handler in app.router.on_shutdown:
+        result = handler()
+        if inspect.isawaitable(result):
+            await result
+
+
+async def timed_calls(client, n: int, call) -> list:
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = await call(client)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return latencies
+
+
+def iterations_for(rows: int, budget_rows: int, minimum: int, maximum: int) -> int:
+    return int(min(maximum, max(minimum, budget_rows // max(rows, 1))))
+
+
+async def bench_api(args, reference: pd.DataFrame) -> list:
+    import httpx
+    import app.main as api
+
+    results = []
+    await start_app(api.app)
+    try:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            if "predict" in args.only:
+                row = sample_rows(reference, 1, args.seed).iloc[0].to_dict()
+                call = lambda c: c.post("/predict", json=row)
+                await timed_calls(client, args.warmup, call)
+                with PeakRss() as peak:
+                    latencies = await timed_calls(client, args.predict_requests, call)
+                results.append(summarize("predict", {}, latencies, 1, peak.peak))
+                print_result(results[-1])
+
+            if "batch" in args.only:
+                for size in args.batch_sizes:
+                    df = sample_rows(reference, size, args.seed + size)
+                    n = iterations_for(size, args.batch_budget_rows, 3, 200)
+                    for fmt, content, content_type, path in (
+                        ("objects", json.dumps(df.to_dict("records")), "application/json", "/predict/batch"),
+                        ("columnar", json.dumps(df.to_dict("list")), "application/json", "/predict/bulk"),
+                    ):
+                        call = lambda c, p=path, b=content, t=content_type: c.post(p, content=b, headers={"content-type": t})
+                        await timed_calls(client, 1, call)
+                        with PeakRss() as peak:
+                            latencies = await timed_calls(client, n, call)
+                        results.append(summarize("batch", {"rows": size, "format": fmt}, latencies, size, peak.peak))
+                        print_result(results[-1])
+    finally:
+        await stop_app(api.app)
+    return results
+
+
+# =========================
+# SCÉNARIOS HORS API
+# =========================
+def bench_drift(args, reference: pd.DataFrame) -> list:
+    from app.drift_detect import detect_drift
+    from app.reference_profile import get_reference_profile
+
+    results = []
+    get_reference_profile(args.reference)
+    with tempfile.TemporaryDirectory() as output_dir:
+        for n_rows in args.drift_rows:
+            path = production_file(reference, n_rows, Path(args.data_dir), args.seed)
+            latencies = []
+            with PeakRss() as peak:
+                for _ in range(args.drift_repeats):
+                    start = time.perf_counter()
+                    detect_drift(args.reference, str(path), output_dir=Path(output_dir), render=False)
+                    latencies.append(time.perf_counter() - start)
+            results.append(summarize("drift", {"rows": n_rows}, latencies, n_rows, peak.peak))
+            print_result(results[-1])
+    return results
+
+
+def load_in_subprocess(path: Path, mode: str, cache_dir: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", DATASET_LOADER, str(path), mode, cache_dir],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_dataset(args, reference: pd.DataFrame) -> list:
+    """
+    pd.read_csv vs cache binaire (app/dataset_cache.py) : « cold » inclut
+    la conversion du CSV, « warm » relit les colonnes déjà converties
+    """
+    import shutil
+
+    results = []
+    for n_rows in args.drift_rows:
+        path = production_file(reference, n_rows, Path(args.data_dir), args.seed)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            runs = {"csv": [], "cache_cold": [], "cache_warm": []}
+            for _ in range(args.drift_repeats):
+                runs["csv"].append(load_in_subprocess(path, "csv", cache_dir))
+                shutil.rmtree(cache_dir)
+                runs["cache_cold"].append(load_in_subprocess(path, "cache", cache_dir))
+                runs["cache_warm"].append(load_in_subprocess(path, "cache", cache_dir))
+            for mode, samples in runs.items():
+                result = summarize(
+                    "dataset", {"rows": n_rows, "mode": mode}, [r["seconds"] for r in samples], n_rows,
+                    max(r["peak_rss_mb"] for r in samples),
+                )
+                result["import_rss_mb"] = round(min(r["import_rss_mb"] for r in samples), 1)
+                results.append(result)
+                print_result(result)
+    return results
+
+
+def bench_model_load(args) -> list:
+    from app.model_registry import load_from_file
+
+    results = []
+    with tempfile.TemporaryDirectory() as mmap_root:
+        for engine in ("sklearn", "compiled", "mmap"):
+            # Premier chargement mmap = export ; les suivants = simple map
+            load_from_file(args.model, engine, mmap_root)
+            latencies = []
+            with PeakRss() as peak:
+                for _ in range(args.load_repeats):
+                    start = time.perf_counter()
+                    load_from_file(args.model, engine, mmap_root)
+                    latencies.append(time.perf_counter() - start)
+            results.append(summarize("model_load", {"engine": engine}, latencies, 1, peak.peak))
+            print_result(results[-1])
+    return results
+
+
+def bench_cold_start(args) -> list:
+    from measure_cold_start import measure
+
+    summary = measure("api", args.cold_start_runs)
+    if "skipped" in summary:
+        return []
+    result = {
+        "name": "cold_start",
+        "params": {"app": "api", "runs": args.cold_start_runs},
+        "iterations": args.cold_start_runs,
+        "p50_ms": round(summary["cold_start_seconds"] * 1000, 1),
+        "max_ms": round(summary["cold_start_max_seconds"] * 1000, 1),
+        "peak_rss_mb": summary["peak_rss_mb"],
+    }
+    print_result(result)
+    return [result]
+
+
+# =========================
+# AFFICHAGE / COMPARAISON
+# =========================
+def result_key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result.get("params", {}).items()) if k != "runs")
+    return f"{result['name']}[{params}]" if params else result["name"]
+
+
+def print_result(result: dict):
+    rate = result.get("rows_per_second")
+    print(
+        f"{result_key(result):<40}"
+        f"{result.get('p50_ms', 0):>10.2f}{result.get('p95_ms', result.get('max_ms', 0)):>10.2f}"
+        f"{result.get('p99_ms', result.get('max_ms', 0)):>10.2f}"
+        f"{(f'{rate:,.0f}' if rate else '-'):>14}{result.get('peak_rss_mb', 0):>9.0f}"
+    )
+
+
+def compare(current: list, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+
+    print("=" * 78)
+    print(f"Comparaison avec {baseline_path} (p50, négatif = plus rapide)")
+    print("=" * 78)
+    for result in current:
+        key = result_key(result)
+        old = baseline.get(key)
+        if old is None or not old.get("p50_ms"):
+            print(f"{key:<40}  nouveau")
+            continue
+        delta = (result["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100
+        print(f"{key:<40}{old['p50_ms']:>10.2f} ms -> {result['p50_ms']:>9.2f} ms  {delta:>+7.1f}%")
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def parse_sizes(value: str):
+    return [int(float(v)) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks en processus de l'API et du moteur de drift")
+    parser.add_argument("--only", default=",".join(SCENARIOS), help=f"Scénarios parmi {', '.join(SCENARIOS)}")
+    parser.add_argument("--quick", action="store_true", help="Tailles réduites (contrôle rapide)")
+    parser.add_argument("--batch-sizes", type=parse_sizes, default=None, help="Tailles de lots, ex. 1,100,10000")
+    parser.add_argument("--drift-rows", type=parse_sizes, default=None, help="Lignes de production (drift, dataset), ex. 10000,1e6")
+    parser.add_argument("--predict-requests", type=int, default=500)
+    parser.add_argument("--batch-budget-rows", type=int, default=200000, help="Lignes scorées par taille de lot")
+    parser.add_argument("--drift-repeats", type=int, default=3)
+    parser.add_argument("--load-repeats", type=int, default=10)
+    parser.add_argument("--cold-start-runs", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--model", default=os.getenv("MODEL_PATH", "model/churn_model.pkl"))
+    parser.add_argument("--reference", default=os.getenv("REFERENCE_FILE", "data/bank_churn.csv"))
+    parser.add_argument("--data-dir", default=str(Path(tempfile.gettempdir()) / "churn-bench-data"),
+                        help="Fichiers de production générés (réutilisés entre exécutions)")
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats")
+    parser.add_argument("--compare", default=None, help="Résultats JSON d'une exécution précédente")
+    args = parser.parse_args(argv)
+
+    args.only = [s.strip() for s in args.only.split(",") if s.strip()]
+    unknown = [s for s in args.only if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"scénario inconnu : {', '.join(unknown)}")
+    if args.batch_sizes is None:
+        args.batch_sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    if args.drift_rows is None:
+        args.drift_rows = QUICK_DRIFT_ROWS if args.quick else DRIFT_ROWS
+    if args.quick:
+        args.predict_requests = min(args.predict_requests, 100)
+        args.batch_budget_rows = min(args.batch_budget_rows, 20000)
+        args.drift_repeats = 1
+        args.cold_start_runs = 1
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    for key, value in BENCH_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ.setdefault("MODEL_PATH", args.model)
+    os.environ.setdefault("REFERENCE_FILE", args.reference)
+    sys.path.insert(0, str(BASE_DIR))
+
+    reference = load_reference(args.reference)
+    results = []
+
+    print("=" * 78)
+    print(f"{'Scénario':<40}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'lignes/s':>14}{'RSS MB':>9}")
+    print("=" * 78)
+    if "predict" in args.only or "batch" in args.only:
+        results += asyncio.run(bench_api(args, reference))
+    if "drift" in args.only:
+        results += bench_drift(args, reference)
+    if "dataset" in args.only:
+        results += bench_dataset(args, reference)
+    if "model_load" in args.only:
+        results += bench_model_load(args)
+    if "cold_start" in args.only:
+        results += bench_cold_start(args)
+    print("=" * 78)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "env": {key: os.environ.get(key) for key in BENCH_ENV},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Résultats : {args.output}")
+    if args.compare:
+        compare(results, args.compare)
@@ -1,117 +1,176 @@
 """
 Génère des données de production avec drift pour tester la détection
+
+Le fichier d'origine (CSV ou Parquet) est lu, drifté et écrit bloc par bloc :
+mémoire constante quelle que soit sa taille, blocs optionnellement traités
+en parallèle. Chaque bloc a son propre générateur aléatoire dérivé de
+(graine, numéro de bloc), donc le résultat ne dépend pas du nombre de workers.
+
+Exemples :
+    python drift_data_gen.py medium
+    python drift_data_gen.py high --input data/bank_churn_50m.parquet --output data/production_50m.parquet --workers 4
 """
+import argparse
+import sys
+import time
+from functools import partial
+
 import pandas as pd
-import numpy as np
 
-def generate_drifted_data(original_file='data/bank_churn.csv', 
-                          output_file='data/production_data.csv',
-                          drift_level='medium'):
+from app.chunked_io import ChunkWriter, chunk_rng, iter_table_chunks, map_chunks
+
+STAT_COLUMNS = ['Age', 'CreditScore', 'Balance', 'EstimatedSalary']
+
+# Paramètres de drift selon le niveau
+DRIFT_PARAMS = {
+    'low': {
+        'age_shift': 2,
+        'credit_shift': 10,
+        'balance_multiplier': 1.05,
+        'salary_shift': 2000
+    },
+    'medium': {
+        'age_shift': 5,
+        'credit_shift': 30,
+        'balance_multiplier': 1.15,
+        'salary_shift': 5000
+    },
+    'high': {
+        'age_shift': 10,
+        'credit_shift': 50,
+        'balance_multiplier': 1.30,
+        'salary_shift': 10000
+    }
+}
+
+
+def drift_chunk(task, drift_level='medium', seed=42):
     """
-    Génère des données avec différents niveaux de drift
-    
-    Args:
-        original_file: Fichier de données d'entraînement
-        output_file: Fichier de sortie pour les données driftées
-        drift_level: 'low', 'medium', 'high'
+    Applique le drift à un bloc ; renvoie (bloc drifté, sommes d'origine)
     """
-    # Charger les données originales
-    df = pd.read_csv(original_file)
-    prod_data = df.copy()
-    
-    # Paramètres de drift selon le niveau
-    drift_params = {
-        'low': {
-            'age_shift': 2,
-            'credit_shift': 10,
-            'balance_multiplier': 1.05,
-            'salary_shift': 2000
-        },
-        'medium': {
-            'age_shift': 5,
-            'credit_shift': 30,
-            'balance_multiplier': 1.15,
-            'salary_shift': 5000
-        },
-        'high': {
-            'age_shift': 10,
-            'credit_shift': 50,
-            'balance_multiplier': 1.30,
-            'salary_shift': 10000
-        }
-    }
-    
-    params = drift_params.get(drift_level, drift_params['medium'])
-    
-    np.random.seed(42)
-    
-    # Appliquer le drift sur les features continues
-    print(f"\n{'='*60}")
-    print(f"GÉNÉRATION DE DONNÉES AVEC DRIFT NIVEAU: {drift_level.upper()}")
-    print(f"{'='*60}")
-    
+    index, prod_data = task
+    params = DRIFT_PARAMS.get(drift_level, DRIFT_PARAMS['medium'])
+    rng = chunk_rng(seed, index)
+    original_sums = prod_data[STAT_COLUMNS].sum()
+
     # Age: Augmentation progressive (population vieillit)
     prod_data['Age'] = prod_data['Age'] + params['age_shift']
-    print(f"✓ Age: +{params['age_shift']} ans (vieillissement de la population)")
-    
+
     # CreditScore: Dégradation générale
     prod_data['CreditScore'] = prod_data['CreditScore'] - params['credit_shift']
     prod_data['CreditScore'] = prod_data['CreditScore'].clip(300, 850)
-    print(f"✓ CreditScore: -{params['credit_shift']} points (dégradation)")
-    
+
     # Balance: Augmentation (inflation)
     prod_data['Balance'] = prod_data['Balance'] * params['balance_multiplier']
-    print(f"✓ Balance: x{params['balance_multiplier']} (inflation)")
-    
+
     # EstimatedSalary: Augmentation
     prod_data['EstimatedSalary'] = prod_data['EstimatedSalary'] + params['salary_shift']
-    print(f"✓ EstimatedSalary: +{params['salary_shift']}€ (augmentation)")
-    
+
     # Changements dans les variables catégorielles
     # Plus de clients inactifs (changement de comportement)
-    inactive_mask = np.random.choice([True, False], size=len(prod_data), p=[0.3, 0.7])
+    inactive_mask = rng.choice([True, False], size=len(prod_data), p=[0.3, 0.7])
     prod_data.loc[inactive_mask, 'IsActiveMember'] = 0
-    print(f"✓ IsActiveMember: 30% de clients deviennent inactifs")
-    
+
     # Distribution géographique change
     if drift_level in ['medium', 'high']:
-        geo_change = np.random.choice([0, 1], size=len(prod_data), p=[0.4, 0.6])
+        geo_change = rng.choice([0, 1], size=len(prod_data), p=[0.4, 0.6])
         prod_data['Geography_Germany'] = geo_change
         prod_data['Geography_Spain'] = 1 - geo_change
+
+    return prod_data, original_sums
+
+
+def generate_drifted_data(original_file='data/bank_churn.csv', 
+                          output_file='data/production_data.csv',
+                          drift_level='medium',
+                          chunk_size=1_000_000,
+                          seed=42,
+                          workers=1):
+    """
+    Génère des données avec différents niveaux de drift
+    
+    Args:
+        original_file: Fichier de données d'entraînement (.csv ou .parquet)
+        output_file: Fichier de sortie pour les données driftées (.csv ou .parquet)
+        drift_level: 'low', 'medium', 'high'
+        chunk_size: Lignes par bloc
+        seed: Graine (un générateur par bloc)
+        workers: Processus de traitement des blocs
+    """
+    params = DRIFT_PARAMS.get(drift_level, DRIFT_PARAMS['medium'])
+    
+    print(f"\n{'='*60}")
+    print(f"GÉNÉRATION DE DONNÉES AVEC DRIFT NIVEAU: {drift_level.upper()}")
+    print(f"{'='*60}")
+    print(f"✓ Age: +{params['age_shift']} ans (vieillissement de la population)")
+    print(f"✓ CreditScore: -{params['credit_shift']} points (dégradation)")
+    print(f"✓ Balance: x{params['balance_multiplier']} (inflation)")
+    print(f"✓ EstimatedSalary: +{params['salary_shift']}€ (augmentation)")
+    print(f"✓ IsActiveMember: 30% de clients deviennent inactifs")
+    if drift_level in ['medium', 'high']:
         print(f"✓ Geography: Changement de distribution (60% Allemagne)")
     
-    # Sauvegarder
-    prod_data.to_csv(output_file, index=False)
+    # Lecture, drift et écriture bloc par bloc ; moyennes cumulées au passage
+    start = time.perf_counter()
+    writer = ChunkWriter(output_file)
+    original_sums = pd.Series(0.0, index=STAT_COLUMNS)
+    prod_sums = pd.Series(0.0, index=STAT_COLUMNS)
+    tasks = enumerate(iter_table_chunks(original_file, chunk_size))
+    try:
+        for prod_data, sums in map_chunks(partial(drift_chunk, drift_level=drift_level, seed=seed), tasks, workers):
+            writer.write(prod_data)
+            original_sums += sums
+            prod_sums += prod_data[STAT_COLUMNS].sum()
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
     
     print(f"\n{'='*60}")
     print(f"📊 STATISTIQUES COMPARATIVES")
     print(f"{'='*60}")
     
     # Comparaison des moyennes
-    original = pd.read_csv(original_file)
-    
-    for col in ['Age', 'CreditScore', 'Balance', 'EstimatedSalary']:
-        orig_mean = original[col].mean()
-        prod_mean = prod_data[col].mean()
+    for col in STAT_COLUMNS:
+        orig_mean = original_sums[col] / writer.rows
+        prod_mean = prod_sums[col] / writer.rows
         change_pct = ((prod_mean - orig_mean) / orig_mean) * 100
         print(f"{col:20s}: {orig_mean:>12.2f} → {prod_mean:>12.2f} ({change_pct:+.1f}%)")
     
     print(f"\n✅ Données générées: {output_file}")
-    print(f"📈 {len(prod_data)} lignes créées")
+    print(f"📈 {writer.rows} lignes créées en {elapsed:.1f}s")
     print(f"{'='*60}\n")
     
-    return prod_data
+    return {
+        "rows": writer.rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(writer.rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generation de donnees de production avec drift")
+    parser.add_argument("drift_level", nargs="?", default="medium", help="low, medium ou high")
+    parser.add_argument("--input", default="data/bank_churn.csv", help="Fichier d'origine .csv ou .parquet")
+    parser.add_argument("--output", default="data/production_data.csv", help="Fichier de sortie .csv ou .parquet")
+    parser.add_argument("--chunk-size", type=lambda v: int(float(v)), default=1_000_000, help="Lignes par bloc")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Processus de traitement des blocs")
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    import sys
-    
-    # Argument optionnel pour le niveau de drift
-    drift_level = sys.argv[1] if len(sys.argv) > 1 else 'medium'
+    args = parse_args()
     
-    if drift_level not in ['low', 'medium', 'high']:
+    if args.drift_level not in ['low', 'medium', 'high']:
         print("❌ Niveau de drift invalide. Utilisez: low, medium, ou high")
         sys.exit(1)
     
     print("\n🎯 Génération de données de production avec drift...")
-    generate_drifted_data(drift_level=drift_level)
\ No newline at end of file
+    generate_drifted_data(
+        args.input,
+        args.output,
+        drift_level=args.drift_level,
+        chunk_size=args.chunk_size,
+        seed=args.seed,
+        workers=args.workers,
+    )
@@ -1,33 +1,88 @@
 # generate_data.py
-import pandas as pd
+"""
+Génère le dataset synthétique de churn, bloc par bloc
+
+Exemples :
+    python generate_data.py
+    python generate_data.py --rows 50e6 --chunk-size 1e6 --workers 4 --output data/bank_churn_50m.parquet
+
+Un bloc = un générateur aléatoire dérivé de (--seed, numéro de bloc) : le
+fichier ne dépend que de --rows, --chunk-size et --seed (pas de --workers).
+Avec les valeurs par défaut, data/bank_churn.csv est reproduit à l'identique.
+"""
+import argparse
+import time
+from functools import partial
+
 import numpy as np
+import pandas as pd
+
+from app.chunked_io import ChunkWriter, chunk_bounds, chunk_rng, map_chunks
+
+
+def generate_chunk(task, seed: int = 42) -> pd.DataFrame:
+    index, start, stop = task
+    rng = chunk_rng(seed, index)
+    n_samples = stop - start
+
+    data = {
+        'CreditScore': rng.randint(300, 850, n_samples),
+        'Age': rng.randint(18, 80, n_samples),
+        'Tenure': rng.randint(0, 11, n_samples),
+        'Balance': rng.uniform(0, 200000, n_samples),
+        'NumOfProducts': rng.randint(1, 5, n_samples),
+        'HasCrCard': rng.choice([0, 1], n_samples),
+        'IsActiveMember': rng.choice([0, 1], n_samples),
+        'EstimatedSalary': rng.uniform(20000, 150000, n_samples),
+        'Geography_Germany': rng.choice([0, 1], n_samples),
+        'Geography_Spain': rng.choice([0, 1], n_samples),
+    }
+
+    # Target : plus de chance de partir si inactif, peu de produits, etc.
+    churn_prob = (
+        (1 - data['IsActiveMember']) * 0.3 +
+        (data['NumOfProducts'] == 1) * 0.2 +
+        (data['Age'] > 60) * 0.15 +
+        (data['Balance'] == 0) * 0.25
+    )
+    data['Exited'] = (rng.random_sample(n_samples) < churn_prob).astype(int)
+
+    return pd.DataFrame(data)
+
+
+def generate_dataset(output_file='data/bank_churn.csv', n_rows=10000, chunk_size=1_000_000, seed=42, workers=1) -> dict:
+    start = time.perf_counter()
+    writer = ChunkWriter(output_file)
+    churned = 0
+    try:
+        for df in map_chunks(partial(generate_chunk, seed=seed), chunk_bounds(n_rows, chunk_size), workers):
+            writer.write(df)
+            churned += int(df['Exited'].sum())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": writer.rows,
+        "churn_rate": churned / writer.rows if writer.rows else 0.0,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(writer.rows / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generation du dataset synthetique de churn")
+    parser.add_argument("--rows", type=lambda v: int(float(v)), default=10000, help="Nombre de lignes (ex. 50e6)")
+    parser.add_argument("--chunk-size", type=lambda v: int(float(v)), default=1_000_000, help="Lignes par bloc")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Processus de generation")
+    parser.add_argument("--output", default="data/bank_churn.csv", help="Fichier .csv ou .parquet")
+    return parser.parse_args(argv)
+
 
-np.random.seed(42)
-n_samples = 10000
-
-data = {
-    'CreditScore': np.random.randint(300, 850, n_samples),
-    'Age': np.random.randint(18, 80, n_samples),
-    'Tenure': np.random.randint(0, 11, n_samples),
-    'Balance': np.random.uniform(0, 200000, n_samples),
-    'NumOfProducts': np.random.randint(1, 5, n_samples),
-    'HasCrCard': np.random.choice([0, 1], n_samples),
-    'IsActiveMember': np.random.choice([0, 1], n_samples),
-    'EstimatedSalary': np.random.uniform(20000, 150000, n_samples),
-    'Geography_Germany': np.random.choice([0, 1], n_samples),
-    'Geography_Spain': np.random.choice([0, 1], n_samples),
-}
-
-# Target : plus de chance de partir si inactif, peu de produits, etc.
-churn_prob = (
-    (1 - data['IsActiveMember']) * 0.3 +
-    (data['NumOfProducts'] == 1) * 0.2 +
-    (data['Age'] > 60) * 0.15 +
-    (data['Balance'] == 0) * 0.25
-)
-data['Exited'] = (np.random.random(n_samples) < churn_prob).astype(int)
-
-df = pd.DataFrame(data)
-df.to_csv('data/bank_churn.csv', index=False)
-print(f"Dataset cree : {len(df)} lignes")
-print(f"Taux de churn : {df['Exited'].mean():.2%}")
\ No newline at end of file
+if __name__ == "__main__":
+    args = parse_args()
+    stats = generate_dataset(args.output, args.rows, args.chunk_size, args.seed, args.workers)
+    print(f"Dataset cree : {stats['rows']} lignes")
+    print(f"Taux de churn : {stats['churn_rate']:.2%}")
+    print(f"Duree : {stats['seconds']}s ({stats['rows_per_second']} lignes/s)")
@@ -0,0 +1,219 @@
+"""
+Recherche d'hyperparamètres du RandomForest (grille ou tirage aléatoire)
+
+- données chargées et découpées une seule fois (split train/test + plis
+  de validation croisée stratifiés), partagées par tous les essais
+- essais évalués pli par pli en parallèle sur tous les coeurs : une tâche =
+  (configuration, pli), chaque forêt sur un seul coeur (pas de sursouscription)
+- arrêt précoce : après `min_folds` plis, une configuration moins bonne que
+  la meilleure sur chaque pli déjà évalué (d'au moins `margin`) est abandonnée
+
+Utilisé par train_model.py --search grid|random.
+"""
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score, roc_auc_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold, train_test_split
+
+DEFAULT_SPACE = {
+    "n_estimators": [50, 100, 200, 400],
+    "max_depth": [6, 8, 10, 14, None],
+    "min_samples_split": [2, 5, 10],
+    "min_samples_leaf": [1, 2, 4],
+    "max_features": ["sqrt", 0.5, None],
+}
+PRIMARY_METRIC = "roc_auc"
+LATENCY_CALLS = 30
+
+
+# =========================
+# DONNÉES PRÉPARÉES
+# =========================
+@dataclass
+class PreparedData:
+    feature_names: List[str]
+    X_train: np.ndarray
+    y_train: np.ndarray
+    X_test: np.ndarray
+    y_test: np.ndarray
+    folds: List[tuple] = field(default_factory=list)
+
+
+def prepare_data(
+    df: pd.DataFrame,
+    target: str = "Exited",
+    test_size: float = 0.2,
+    cv: int = 5,
+    random_state: int = 42,
+) -> PreparedData:
+    """
+    Split 80/20 identique à train_model.py sur le DataFrame déjà chargé,
+    matrices contiguës et indices des plis calculés une fois
+    """
+    X = df.drop(target, axis=1)
+    y = df[target]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=test_size, random_state=random_state, stratify=y
+    )
+    X_train_np = np.ascontiguousarray(X_train.to_numpy(dtype=np.float64))
+    y_train_np = y_train.to_numpy()
+    folds = list(StratifiedKFold(n_splits=cv, shuffle=True, random_state=random_state).split(X_train_np, y_train_np))
+    return PreparedData(
+        feature_names=list(X.columns),
+        X_train=X_train_np,
+        y_train=y_train_np,
+        X_test=np.ascontiguousarray(X_test.to_numpy(dtype=np.float64)),
+        y_test=y_test.to_numpy(),
+        folds=folds,
+    )
+
+
+def candidates(space: Dict, mode: str = "random", n_iter: int = 20, random_state: int = 42) -> List[Dict]:
+    if mode == "grid":
+        return list(ParameterGrid(space))
+    return list(ParameterSampler(space, n_iter=n_iter, random_state=random_state))
+
+
+def load_space(path: Optional[str]) -> Dict:
+    if not path:
+        return DEFAULT_SPACE
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# =========================
+# ÉVALUATION D'UN PLI
+# =========================
+def _inference_latency(model, X_val: np.ndarray) -> Dict:
+    row = X_val[:1]
+    timings = []
+    for _ in range(LATENCY_CALLS):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    model.predict_proba(X_val)
+    batch_seconds = time.perf_counter() - start
+    return {
+        "predict_latency_ms_p50": float(np.median(timings) * 1000),
+        "predict_latency_ms_p95": float(np.percentile(timings, 95) * 1000),
+        "batch_rows_per_second": float(len(X_val) / batch_seconds) if batch_seconds else 0.0,
+    }
+
+
+def evaluate_fold(params: Dict, X: np.ndarray, y: np.ndarray, train_idx, val_idx, random_state: int, measure_latency: bool) -> Dict:
+    model = RandomForestClassifier(**params, random_state=random_state, n_jobs=1)
+    start = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    X_val, y_val = X[val_idx], y[val_idx]
+    proba = model.predict_proba(X_val)[:, 1]
+    pred = (proba > 0.5).astype(int)
+    result = {
+        "roc_auc": roc_auc_score(y_val, proba),
+        "accuracy": accuracy_score(y_val, pred),
+        "precision": precision_score(y_val, pred, zero_division=0),
+        "recall": recall_score(y_val, pred),
+        "f1_score": f1_score(y_val, pred),
+        "fit_seconds": fit_seconds,
+    }
+    if measure_latency:
+        result.update(_inference_latency(model, X_val))
+    return result
+
+
+# =========================
+# RECHERCHE
+# =========================
+@dataclass
+class Trial:
+    number: int
+    params: Dict
+    folds: List[Dict] = field(default_factory=list)
+    status: str = "running"
+
+    def scores(self) -> np.ndarray:
+        return np.array([f[PRIMARY_METRIC] for f in self.folds])
+
+    @property
+    def mean_score(self) -> float:
+        return float(self.scores().mean()) if self.folds else float("-inf")
+
+    def metrics(self) -> Dict:
+        data = {}
+        for name in ("roc_auc", "accuracy", "precision", "recall", "f1_score", "fit_seconds"):
+            values = [f[name] for f in self.folds]
+            data[f"cv_{name}_mean"] = float(np.mean(values))
+            data[f"cv_{name}_std"] = float(np.std(values))
+        for name in ("predict_latency_ms_p50", "predict_latency_ms_p95", "batch_rows_per_second"):
+            if name in self.folds[0]:
+                data[name] = self.folds[0][name]
+        data["folds_evaluated"] = len(self.folds)
+        return data
+
+
+def is_dominated(trial: Trial, leader: Trial, margin: float) -> bool:
+    """
+    Moins bon que le meilleur sur chacun des plis communs, d'au moins `margin`
+    """
+    n = min(len(trial.folds), len(leader.folds))
+    return bool(np.all(trial.scores()[:n] < leader.scores()[:n] - margin))
+
+
+def search(
+    data: PreparedData,
+    param_list: List[Dict],
+    n_jobs: int = -1,
+    margin: float = 0.005,
+    min_folds: int = 2,
+    random_state: int = 42,
+    on_trial: Optional[Callable[[Trial], None]] = None,
+) -> List[Trial]:
+    """
+    Évalue les configurations pli par pli ; on_trial(trial) est appelé dès
+    qu'un essai est terminé ou abandonné
+    """
+    trials = [Trial(number=i, params=params) for i, params in enumerate(param_list)]
+    alive = list(trials)
+
+    # Un seul pool de workers réutilisé pour tous les plis ; les tableaux sont
+    # mappés en mémoire partagée par joblib au lieu d'être copiés par tâche
+    with Parallel(n_jobs=n_jobs, max_nbytes="1M") as parallel:
+        for fold_number, (train_idx, val_idx) in enumerate(data.folds):
+            results = parallel(
+                delayed(evaluate_fold)(
+                    trial.params, data.X_train, data.y_train, train_idx, val_idx,
+                    random_state, fold_number == 0,
+                )
+                for trial in alive
+            )
+            for trial, result in zip(alive, results):
+                trial.folds.append(result)
+
+            if fold_number + 1 >= min_folds and fold_number + 1 < len(data.folds):
+                leader = max(alive, key=lambda t: t.mean_score)
+                for trial in [t for t in alive if t is not leader and is_dominated(t, leader, margin)]:
+                    trial.status = "pruned"
+                    alive.remove(trial)
+                    if on_trial is not None:
+                        on_trial(trial)
+
+    for trial in alive:
+        trial.status = "completed"
+        if on_trial is not None:
+            on_trial(trial)
+    return trials
+
+
+def best_trial(trials: List[Trial]) -> Trial:
+    completed = [t for t in trials if t.status == "completed"]
+    return max(completed, key=lambda t: t.mean_score)
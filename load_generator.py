@@ -0,0 +1,343 @@
+"""
+Générateur de charge asyncio en boucle ouverte
+
+Contrairement à monitoring_load_test.py (10 workers bloquants), les
+requêtes partent à heure fixe quel que soit le temps de réponse : un
+serveur lent ne fait pas baisser le débit envoyé. La latence est mesurée
+depuis l'heure d'envoi prévue (correction de l'omission coordonnée) et
+enregistrée dans un histogramme à précision relative fixe (style HDR).
+
+Exemples :
+    python load_generator.py --rate 100 --duration 60
+    python load_generator.py --base-url http://localhost:8000 --rate 200 \\
+        --mix predict=0.9,batch=0.09,drift=0.01 \\
+        --gate predict.p99_ms=150 --gate error_rate=0.01 --output charge.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+DEFAULT_MIX = "predict=0.9,batch=0.09,drift=0.01"
+ENDPOINTS = ("predict", "batch", "drift")
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+
+# =========================================
+# HISTOGRAMME DE LATENCES
+# =========================================
+class LatencyHistogram:
+    """
+    Buckets logarithmiques : erreur relative bornée (1 % par défaut) de
+    1 µs à plusieurs minutes, mémoire constante quel que soit le volume
+    """
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.counts: Counter = Counter()
+        self.count = 0
+        self.max_us = 0.0
+        self.min_us = math.inf
+
+    def record(self, seconds: float):
+        value_us = max(1.0, seconds * 1e6)
+        self.counts[int(math.log(value_us) / self._log_base)] += 1
+        self.count += 1
+        self.max_us = max(self.max_us, value_us)
+        self.min_us = min(self.min_us, value_us)
+
+    def _bucket_value_us(self, index: int) -> float:
+        # Borne haute du bucket
+        return math.exp((index + 1) * self._log_base)
+
+    def percentile_ms(self, percentile: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = math.ceil(percentile / 100 * self.count)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._bucket_value_us(index), self.max_us) / 1000
+        return self.max_us / 1000
+
+    def summary(self) -> Dict:
+        data = {f"p{p:g}_ms": _round(self.percentile_ms(p)) for p in PERCENTILES}
+        data["min_ms"] = _round(self.min_us / 1000) if self.count else None
+        data["max_ms"] = _round(self.max_us / 1000) if self.count else None
+        return data
+
+    def to_dict(self) -> Dict:
+        return {
+            "precision": self.precision,
+            "buckets": {f"{self._bucket_value_us(i) / 1000:.4f}": n for i, n in sorted(self.counts.items())},
+        }
+
+
+def _round(value: Optional[float], digits: int = 3) -> Optional[float]:
+    return None if value is None else round(value, digits)
+
+
+# =========================================
+# PAYLOADS
+# =========================================
+def random_customer(rng: random.Random) -> Dict:
+    # Un seul pays (France = aucun des deux indicateurs)
+    geography = rng.choice(("France", "Germany", "Spain"))
+    return {
+        "CreditScore": rng.randint(350, 850),
+        "Age": rng.randint(18, 80),
+        "Tenure": rng.randint(0, 10),
+        "Balance": round(rng.uniform(0, 250000), 2),
+        "NumOfProducts": rng.randint(1, 4),
+        "HasCrCard": rng.randint(0, 1),
+        "IsActiveMember": rng.randint(0, 1),
+        "EstimatedSalary": round(rng.uniform(15000, 200000), 2),
+        "Geography_Germany": int(geography == "Germany"),
+        "Geography_Spain": int(geography == "Spain"),
+    }
+
+
+def build_request(endpoint: str, rng: random.Random, batch_size: int):
+    if endpoint == "predict":
+        return "POST", "/predict", {"json": random_customer(rng)}
+    if endpoint == "batch":
+        return "POST", "/predict/batch", {"json": [random_customer(rng) for _ in range(batch_size)]}
+    # wait=true : la latence mesurée est celle du contrôle complet, pas du 202 de soumission
+    return "POST", "/drift/check", {"params": {"threshold": 0.05, "wait": "true"}}
+
+
+# =========================================
+# STATISTIQUES PAR ENDPOINT
+# =========================================
+class EndpointStats:
+    def __init__(self, name: str, rate: float):
+        self.name = name
+        self.target_rate = rate
+        # Latence depuis l'heure prévue (inclut l'attente côté client)
+        self.latency = LatencyHistogram()
+        # Temps de service seul (depuis l'envoi effectif)
+        self.service = LatencyHistogram()
+        self.sent = 0
+        self.ok = 0
+        self.errors: Counter = Counter()
+        self.skipped = 0
+
+    def record(self, scheduled: float, started: float, finished: float, error: Optional[str]):
+        self.latency.record(finished - scheduled)
+        self.service.record(finished - started)
+        if error is None:
+            self.ok += 1
+        else:
+            self.errors[error] += 1
+
+    def summary(self, duration: float) -> Dict:
+        completed = self.ok + sum(self.errors.values())
+        return {
+            "target_rate": self.target_rate,
+            "achieved_rate": round(completed / duration, 2) if duration else 0.0,
+            "sent": self.sent,
+            "ok": self.ok,
+            "errors": dict(self.errors),
+            "error_rate": round(1 - self.ok / completed, 5) if completed else 0.0,
+            "skipped_client_saturated": self.skipped,
+            "latency": self.latency.summary(),
+            "service_time": self.service.summary(),
+        }
+
+
+def classify(status_code: int) -> Optional[str]:
+    if 200 <= status_code < 300:
+        return None
+    if status_code in (429, 503):
+        return f"shed_{status_code}"
+    return f"http_{status_code}"
+
+
+# =========================================
+# BOUCLE OUVERTE
+# =========================================
+async def fire(client, stats: EndpointStats, request, scheduled: float, measuring: bool, in_flight: List[int]):
+    method, path, kwargs = request
+    started = time.perf_counter()
+    error = None
+    try:
+        response = await client.request(method, path, **kwargs)
+        error = classify(response.status_code)
+    except Exception as e:
+        error = type(e).__name__
+    finally:
+        in_flight[0] -= 1
+    if measuring:
+        stats.record(scheduled, started, time.perf_counter(), error)
+
+
+async def drive_endpoint(client, stats: EndpointStats, args, start: float, stop: float, measure_from: float, in_flight, tasks):
+    """
+    Arrivées à débit fixe (ou Poisson) pour un endpoint, indépendamment des réponses
+    """
+    if stats.target_rate <= 0:
+        return
+    rng = random.Random(f"{args.seed}-{stats.name}")
+    interval = 1.0 / stats.target_rate
+    next_at = start
+
+    while next_at < stop:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        measuring = next_at >= measure_from
+        if in_flight[0] >= args.max_in_flight:
+            # Client saturé : on ne retarde pas les envois suivants, on compte l'omission
+            if measuring:
+                stats.skipped += 1
+        else:
+            in_flight[0] += 1
+            if measuring:
+                stats.sent += 1
+            request = build_request(stats.name, rng, args.batch_size)
+            tasks.add(asyncio.create_task(fire(client, stats, request, next_at, measuring, in_flight)))
+
+        next_at += rng.expovariate(stats.target_rate) if args.poisson else interval
+
+
+async def run(args) -> Dict:
+    import httpx
+
+    mix = parse_mix(args.mix)
+    total_weight = sum(mix.values())
+    stats = {name: EndpointStats(name, args.rate * weight / total_weight) for name, weight in mix.items()}
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    timeout = httpx.Timeout(args.timeout)
+    in_flight = [0]
+    tasks = set()
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        start = time.perf_counter() + 0.1
+        measure_from = start + args.warmup
+        stop = measure_from + args.duration
+        await asyncio.gather(*(
+            drive_endpoint(client, s, args, start, stop, measure_from, in_flight, tasks)
+            for s in stats.values()
+        ))
+        if tasks:
+            await asyncio.wait(tasks, timeout=args.timeout)
+
+    endpoints = {name: s.summary(args.duration) for name, s in stats.items()}
+    ok = sum(s.ok for s in stats.values())
+    completed = ok + sum(sum(s.errors.values()) for s in stats.values())
+    return {
+        "base_url": args.base_url,
+        "rate": args.rate,
+        "mix": mix,
+        "duration_seconds": args.duration,
+        "warmup_seconds": args.warmup,
+        "arrivals": "poisson" if args.poisson else "constant",
+        "error_rate": round(1 - ok / completed, 5) if completed else 0.0,
+        "endpoints": endpoints,
+        "histograms": {name: s.latency.to_dict() for name, s in stats.items()},
+    }
+
+
+# =========================================
+# SEUILS DE DÉPLOIEMENT
+# =========================================
+def check_gates(summary: Dict, gates: List[str]) -> List[str]:
+    """
+    Seuils "endpoint.metrique=max" (ex. predict.p99_ms=150) ou
+    "error_rate=0.01" (global) ; renvoie la liste des seuils dépassés
+    """
+    failures = []
+    for gate in gates:
+        name, _, limit = gate.partition("=")
+        limit = float(limit)
+        endpoint, _, metric = name.rpartition(".")
+        if endpoint:
+            data = summary["endpoints"].get(endpoint)
+            if data is None:
+                failures.append(f"{gate}: endpoint {endpoint} absent du mélange")
+                continue
+            value = data["latency"].get(metric, data.get(metric))
+        else:
+            value = summary.get(metric)
+        if value is None:
+            failures.append(f"{gate}: aucune mesure")
+        elif value > limit:
+            failures.append(f"{gate}: mesuré {value}")
+    return failures
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, weight = item.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Endpoint inconnu dans --mix : {name}")
+        mix[name] = float(weight)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("--mix doit contenir au moins un poids positif")
+    return mix
+
+
+def print_summary(summary: Dict):
+    print("=" * 96)
+    print(f"{'Endpoint':<10}{'cible/s':>9}{'reçu/s':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'max':>10}{'erreurs':>10}  détail")
+    print("=" * 96)
+    for name, data in summary["endpoints"].items():
+        lat = data["latency"]
+        fmt = lambda v: f"{v:.1f}" if v is not None else "-"
+        print(
+            f"{name:<10}{data['target_rate']:>9.2f}{data['achieved_rate']:>9.2f}"
+            f"{fmt(lat['p50_ms']):>9}{fmt(lat['p90_ms']):>9}{fmt(lat['p99_ms']):>9}{fmt(lat['p99.9_ms']):>9}"
+            f"{fmt(lat['max_ms']):>10}{data['error_rate'] * 100:>9.2f}%  {data['errors'] or ''}"
+        )
+        if data["skipped_client_saturated"]:
+            print(f"{'':<10}⚠️  {data['skipped_client_saturated']} envois omis (client saturé, --max-in-flight)")
+    print("=" * 96)
+    print("Latences en ms, mesurées depuis l'heure d'envoi prévue")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Charge asyncio à débit fixe (boucle ouverte)")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--rate", type=float, default=50.0, help="Requêtes par seconde (tous endpoints)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"Poids par endpoint (défaut : {DEFAULT_MIX})")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée mesurée en secondes")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Secondes de chauffe non mesurées")
+    parser.add_argument("--batch-size", type=int, default=100, help="Clients par appel /predict/batch")
+    parser.add_argument("--poisson", action="store_true", help="Arrivées de Poisson au lieu d'un intervalle fixe")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Requêtes simultanées max côté client")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--gate", action="append", default=[], help="Seuil, ex. predict.p99_ms=150 ou error_rate=0.01")
+    parser.add_argument("--output", default=None, help="Résumé JSON (avec histogrammes)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    summary = asyncio.run(run(args))
+    print_summary(summary)
+
+    failures = check_gates(summary, args.gate)
+    summary["gates"] = {"checked": args.gate, "failed": failures, "passed": not failures}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Résultats : {args.output}")
+
+    if failures:
+        print("❌ Seuils dépassés :")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    if args.gate:
+        print("✅ Tous les seuils sont respectés")
@@ -0,0 +1,156 @@
+"""
+Mesure du démarrage à froid (temps + mémoire) de chaque application
+
+Chaque mesure tourne dans un interpréteur neuf, comme un conteneur qui
+redémarre après une mise à l'échelle à zéro.
+
+Exemple :
+    python measure_cold_start.py --runs 5 --output cold_start.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+PLOTTING_MODULES = ["matplotlib", "matplotlib.pyplot", "seaborn"]
+
+# Code exécuté dans le processus mesuré ; affiche une ligne JSON sur stdout
+_PROBE = r"""
+import json, sys, time, resource
+start = time.perf_counter()
+{load}
+import_seconds = time.perf_counter() - start
+start = time.perf_counter()
+{startup}
+startup_seconds = time.perf_counter() - start
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+print(json.dumps({{
+    "import_seconds": import_seconds,
+    "startup_seconds": startup_seconds,
+    "rss_mb": rss_mb(),
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "plotting_loaded": [m for m in {plotting!r} if m in sys.modules],
+    "modules": len(sys.modules),
+}}))
+"""
+
+APPS = {
+    # API : import de app.main puis hooks de démarrage (modèle, profil de référence)
+    "api": {
+        "load": "import app.main",
+        "startup": (
+            "import asyncio, inspect\n"
+            "for handler in app.main.app.router.on_startup:\n"
+            "    result = handler()\n"
+            "    if inspect.isawaitable(result):\n"
+            "        asyncio.run(result)"
+        ),
+    },
+    # Rendu différé des graphiques (render_drift.py)
+    "renderer": {
+        "load": "import render_drift",
+        "startup": "from app.drift_detect import _plotting; _plotting()",
+    },
+    # Interface Streamlit (le script est exécuté à l'import, hors serveur)
+    "streamlit": {
+        "load": "import streamlit_app",
+        "startup": "pass",
+        "requires": "streamlit",
+    },
+}
+
+
+def measure_once(app_name: str) -> dict:
+    spec = APPS[app_name]
+    code = _PROBE.format(load=spec["load"], startup=spec["startup"], plotting=PLOTTING_MODULES)
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "échec")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(app_name: str, runs: int) -> dict:
+    requires = APPS[app_name].get("requires")
+    if requires:
+        probe = subprocess.run([sys.executable, "-c", f"import {requires}"], capture_output=True)
+        if probe.returncode != 0:
+            return {"app": app_name, "skipped": f"{requires} non installé"}
+
+    samples = [measure_once(app_name) for _ in range(runs)]
+    total = [s["import_seconds"] + s["startup_seconds"] for s in samples]
+    return {
+        "app": app_name,
+        "runs": runs,
+        "import_seconds": round(statistics.median(s["import_seconds"] for s in samples), 3),
+        "startup_seconds": round(statistics.median(s["startup_seconds"] for s in samples), 3),
+        "cold_start_seconds": round(statistics.median(total), 3),
+        "cold_start_max_seconds": round(max(total), 3),
+        "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+        "peak_rss_mb": round(max(s["peak_rss_mb"] for s in samples), 1),
+        "plotting_loaded": samples[-1]["plotting_loaded"],
+        "modules": samples[-1]["modules"],
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Temps de démarrage à froid et mémoire par application")
+    parser.add_argument("apps", nargs="*", help=f"Applications parmi {', '.join(APPS)} (défaut : toutes)")
+    parser.add_argument("--runs", type=int, default=3, help="Processus neufs par application (médiane)")
+    parser.add_argument("--output", default=None, help="Fichier JSON des résultats")
+    args = parser.parse_args(argv)
+    unknown = [a for a in args.apps if a not in APPS]
+    if unknown:
+        parser.error(f"application inconnue : {', '.join(unknown)}")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = []
+
+    print("=" * 70)
+    print(f"{'Application':<12}{'import':>9}{'startup':>10}{'total':>9}{'RSS':>10}{'pic RSS':>10}  graphiques")
+    print("=" * 70)
+    for app_name in args.apps or list(APPS):
+        try:
+            result = measure(app_name, args.runs)
+        except RuntimeError as e:
+            result = {"app": app_name, "error": str(e)}
+        results.append(result)
+
+        if "skipped" in result or "error" in result:
+            print(f"{app_name:<12}  {result.get('skipped') or result.get('error')}")
+            continue
+        print(
+            f"{app_name:<12}{result['import_seconds']:>8.2f}s{result['startup_seconds']:>9.2f}s"
+            f"{result['cold_start_seconds']:>8.2f}s{result['rss_mb']:>7.0f} MB{result['peak_rss_mb']:>7.0f} MB"
+            f"  {', '.join(result['plotting_loaded']) or 'non'}"
+        )
+    print("=" * 70)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Résultats : {args.output}")
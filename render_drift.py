@@ -0,0 +1,58 @@
+"""
+Rendu différé des graphiques de drift, hors du processus de l'API
+
+Les contrôles lancés avec render=false écrivent seulement le rapport JSON ;
+ce script dessine ensuite drift_distributions.png et drift_heatmap.png.
+
+Exemple :
+    python render_drift.py                      # rapports non dessinés de drift_reports/
+    python render_drift.py drift_reports/drift_report_20250101_120000.json
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.drift_detect import OUTPUT_DIR, render_drift_report
+
+
+def pending_reports(reports_dir: Path):
+    """
+    Rapports JSON pas encore dessinés, du plus ancien au plus récent
+    """
+    pending = []
+    for path in sorted(reports_dir.glob("drift_report_*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                if not json.load(f).get("rendered", True):
+                    pending.append(path)
+        except (OSError, ValueError):
+            continue
+    return pending
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Graphiques des rapports de drift générés sans rendu")
+    parser.add_argument("reports", nargs="*", help="Rapports JSON (défaut : rapports non dessinés)")
+    parser.add_argument("--reports-dir", default=str(OUTPUT_DIR))
+    parser.add_argument("--output-dir", default=None, help="Dossier des PNG (défaut : celui du rapport)")
+    parser.add_argument("--latest", action="store_true", help="Ne dessiner que le rapport le plus récent")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    reports = [Path(r) for r in args.reports] or pending_reports(Path(args.reports_dir))
+    if args.latest:
+        reports = reports[-1:]
+
+    if not reports:
+        print("Aucun rapport à dessiner")
+        sys.exit(0)
+
+    for report in reports:
+        start = time.perf_counter()
+        output_dir = render_drift_report(report, output_dir=args.output_dir)
+        print(f"{report.name} -> {output_dir} ({time.perf_counter() - start:.2f}s)")
@@ -1,6 +1,19 @@
 #!/bin/sh
+# Nombre de workers uvicorn (API_WORKERS, 1 par défaut)
+API_WORKERS=${API_WORKERS:-1}
+if [ "$API_WORKERS" -gt 1 ]; then
+  # Plusieurs workers : forêt mappée en lecture seule, une seule copie en mémoire.
+  # Chaque worker a son propre état : le watcher suit les changements de modèle.
+  export MODEL_ENGINE=${MODEL_ENGINE:-mmap}
+  export MODEL_WATCH_INTERVAL_SECONDS=${MODEL_WATCH_INTERVAL_SECONDS:-30}
+  if [ "$MODEL_ENGINE" = "mmap" ]; then
+    # Export fait une fois avant le démarrage des workers
+    python -m app.shared_model
+  fi
+fi
+
 # Lancer FastAPI en arrière-plan
-uvicorn app.main:app --host 0.0.0.0 --port 8000 &
+uvicorn app.main:app --host 0.0.0.0 --port 8000 --workers "$API_WORKERS" &
 
 # Attendre 10 secondes que l'API soit prête
 sleep 10
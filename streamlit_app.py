@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 import pandas as pd
+import time
 
 # Configuration de la page
 st.set_page_config(page_title="Bank Churn MLOps", page_icon="🏦", layout="wide")
@@ -104,12 +105,19 @@ else:
                 # Nettoyage de l'URL pour éviter les doubles slashes ou slashes finaux
                 url_clean = DRIFT_URL.rstrip('/')
                 
-                # Utilisation de 'params' pour passer le threshold proprement
+                # Le contrôle tourne en tâche de fond : on soumet puis on interroge le job
                 response = requests.post(url_clean, params={"threshold": threshold}, timeout=30)
+                job = response.json() if response.status_code == 202 else {}
+                status_url = f"{BASE_URL}{job.get('status_url', '')}"
+
+                deadline = time.time() + 120
+                while job.get("status") in ("queued", "running") and time.time() < deadline:
+                    time.sleep(1)
+                    job = requests.get(status_url, timeout=10).json()
 
             # Vérification du statut HTTP
-            if response.status_code == 200:
-                results = response.json()
+            if response.status_code == 202 and job.get("status") == "succeeded":
+                results = job["result"]["results"]
 
                 # SÉCURITÉ : On vérifie que 'results' est bien un dictionnaire
                 if isinstance(results, dict) and len(results) > 0:
@@ -149,6 +157,8 @@ else:
                 else:
                     st.error("L'API a renvoyé un format de données vide ou invalide.")
             
+            elif response.status_code == 202:
+                st.error(f"Le contrôle de drift n'a pas abouti (statut : {job.get('status')}) : {job.get('error', '')}")
             elif response.status_code == 405:
                 st.error("Erreur 405 : La méthode POST n'est pas autorisée sur cet URL. Vérifiez la config de l'API.")
             else:
@@ -0,0 +1,48 @@
+"""
+Fixtures communes : petit modèle entraîné sur data/bank_churn.csv et client
+de test de l'API (les variables d'environnement sont lues à l'import de
+app.main, d'où leur définition ici)
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import joblib
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+MODEL_DIR = Path(tempfile.mkdtemp(prefix="churn-model-"))
+MODEL_FILE = MODEL_DIR / "churn_model.pkl"
+
+os.environ.setdefault("MODEL_PATH", str(MODEL_FILE))
+os.environ.setdefault("TELEMETRY_SINKS", "none")
+os.environ.setdefault("MODEL_WATCH_INTERVAL_SECONDS", "0")
+
+
+def _train_model():
+    from app.inference import FEATURE_COLUMNS
+
+    df = pd.read_csv(ROOT / "data" / "bank_churn.csv")
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=42)
+    model.fit(df[FEATURE_COLUMNS], df["Exited"])
+    joblib.dump(model, MODEL_FILE)
+
+
+if not MODEL_FILE.exists():
+    _train_model()
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
@@ -0,0 +1,83 @@
+"""
+/predict/bulk : codes d'erreur des corps invalides
+"""
+
+import io
+
+import numpy as np
+import orjson
+
+from app.inference import FEATURE_COLUMNS
+
+ROW = [600, 40, 5, 1000.0, 2, 1, 1, 50000.0, 0, 1]
+
+
+def _csv(rows):
+    lines = [",".join(FEATURE_COLUMNS)] + [",".join("" if v is None else str(v) for v in row) for row in rows]
+    return "\n".join(lines) + "\n"
+
+
+def test_csv_ok(client):
+    response = client.post("/predict/bulk", content=_csv([ROW, ROW]), headers={"content-type": "text/csv"})
+    assert response.status_code == 200
+    assert response.text.startswith("churn_probability,prediction\n")
+
+
+def test_csv_empty_cell_is_422(client):
+    row = list(ROW)
+    row[1] = None
+    response = client.post("/predict/bulk", content=_csv([ROW, row]), headers={"content-type": "text/csv"})
+    assert response.status_code == 422
+    errors = response.json()["detail"]
+    assert errors[0]["column"] == "Age"
+    assert errors[0]["error"] == "missing_value"
+    assert errors[0]["examples"] == [{"row": 1, "value": None}]
+
+
+def test_npy_inf_is_422(client):
+    X = np.array([ROW, ROW], dtype=np.float64)
+    X[0, 3] = np.inf
+    buffer = io.BytesIO()
+    np.save(buffer, X)
+    response = client.post("/predict/bulk", content=buffer.getvalue(), headers={"content-type": "application/x-npy"})
+    assert response.status_code == 422
+    errors = response.json()["detail"]
+    assert errors[0]["column"] == "Balance"
+    assert errors[0]["examples"] == [{"row": 0, "value": "inf"}]
+
+
+def test_columnar_json_null_is_422(client):
+    payload = {col: [value, value] for col, value in zip(FEATURE_COLUMNS, ROW)}
+    payload["Tenure"][1] = None
+    response = client.post("/predict/bulk", content=orjson.dumps(payload), headers={"content-type": "application/json"})
+    assert response.status_code == 422
+    errors = response.json()["detail"]
+    assert [(e["column"], e["error"]) for e in errors] == [("Tenure", "missing_value")]
+
+
+def test_malformed_csv_is_400(client):
+    response = client.post("/predict/bulk", content='CreditScore,Age\n1,"x', headers={"content-type": "text/csv"})
+    assert response.status_code == 400
+
+
+def test_unsupported_media_type_is_415(client):
+    response = client.post("/predict/bulk", content=b"<a/>", headers={"content-type": "application/xml"})
+    assert response.status_code == 415
+
+
+def test_columnar_json_row_limit_is_413(client, monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "MAX_BULK_ROWS", 2)
+    payload = {col: [value] * 3 for col, value in zip(FEATURE_COLUMNS, ROW)}
+    response = client.post("/predict/bulk", content=orjson.dumps(payload), headers={"content-type": "application/json"})
+    assert response.status_code == 413
+
+
+def test_body_size_limit_is_413(client, monkeypatch):
+    from app import main
+
+    monkeypatch.setattr(main, "MAX_BULK_BODY_MB", 0)
+    payload = {col: [value] for col, value in zip(FEATURE_COLUMNS, ROW)}
+    response = client.post("/predict/bulk", content=orjson.dumps(payload), headers={"content-type": "application/json"})
+    assert response.status_code == 413
@@ -0,0 +1,65 @@
+"""
+InferenceExecutor : compteurs pending / running après annulation
+"""
+
+import threading
+
+import numpy as np
+
+from app.executor import InferenceExecutor
+
+
+def _blocking_executor(release: threading.Event, started: threading.Event) -> InferenceExecutor:
+    executor = InferenceExecutor(backend="thread", threads=1, max_queue=4)
+
+    def score(handle, X):
+        started.set()
+        release.wait(5)
+        return np.zeros(X.shape[0])
+
+    executor._score_threads = score
+    return executor
+
+
+def test_cancelled_queued_job_is_not_counted_as_running():
+    release, started = threading.Event(), threading.Event()
+    executor = _blocking_executor(release, started)
+    X = np.zeros((2, 10))
+    try:
+        first = executor.submit(None, X)
+        assert started.wait(5)
+        queued = executor.submit(None, X)
+
+        assert queued.cancel()
+        stats = executor.stats()
+        assert stats["running"] == 1
+        assert stats["queue_depth"] == 0
+        assert stats["cancelled"] == 1
+
+        release.set()
+        assert first.result(5).shape == (2,)
+        # La tâche annulée passe dans le pool sans rien exécuter
+        executor.submit(None, X).result(5)
+        stats = executor.stats()
+        assert stats["running"] == 0
+        assert stats["queue_depth"] == 0
+        assert stats["completed"] == 2
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_running_job_cannot_be_cancelled():
+    release, started = threading.Event(), threading.Event()
+    executor = _blocking_executor(release, started)
+    try:
+        future = executor.submit(None, np.zeros((1, 10)))
+        assert started.wait(5)
+        assert not future.cancel()
+        assert executor.stats()["running"] == 1
+        release.set()
+        future.result(5)
+        assert executor.stats()["running"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
@@ -0,0 +1,37 @@
+"""
+Exports mappables : suppression des anciennes versions
+"""
+
+import gc
+
+import joblib
+
+from app.compiled_model import CompiledForest
+from app.shared_model import export_dir, is_exported, load_shared, prune_exports
+
+from conftest import MODEL_FILE
+
+
+def _export(root, fingerprint):
+    return load_shared(fingerprint, lambda: CompiledForest.from_sklearn(joblib.load(MODEL_FILE)), root)
+
+
+def test_prune_keeps_active_previous_and_mapped_exports(tmp_path):
+    for fingerprint in ("v1", "v2", "v3", "v4"):
+        _export(tmp_path, fingerprint)
+    gc.collect()
+    # v1 encore mappé (ex. requête en cours sur un ancien modèle)
+    still_mapped = _export(tmp_path, "v1")
+    (tmp_path / ".v5.tmp").mkdir()
+
+    removed = prune_exports(tmp_path, {"v4", "v3"})
+
+    assert removed == ["v2"]
+    assert is_exported(tmp_path, "v1")
+    assert not export_dir(tmp_path, "v2").exists()
+    assert is_exported(tmp_path, "v3") and is_exported(tmp_path, "v4")
+    assert not (tmp_path / ".v5.tmp").exists()
+
+    del still_mapped
+    gc.collect()
+    assert prune_exports(tmp_path, {"v4", "v3"}) == ["v1"]
@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -11,17 +12,33 @@ from sklearn.metrics import (
     confusion_matrix
 )
 import joblib
+import time
 import mlflow
 import mlflow.sklearn
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from app.dataset_cache import read_table
+from hyperparam_search import best_trial, candidates, load_space, prepare_data, search
+
+# Options : entrainement simple (defaut) ou recherche d'hyperparametres
+parser = argparse.ArgumentParser(description="Entrainement du modele de churn")
+parser.add_argument("--search", choices=["none", "grid", "random"], default="none",
+                    help="Recherche d'hyperparametres avant l'entrainement final")
+parser.add_argument("--n-iter", type=int, default=20, help="Configurations tirees (--search random)")
+parser.add_argument("--cv", type=int, default=5, help="Plis de validation croisee")
+parser.add_argument("--n-jobs", type=int, default=-1, help="Coeurs utilises (-1 = tous)")
+parser.add_argument("--margin", type=float, default=0.005,
+                    help="Ecart de ROC AUC par pli au-dela duquel une configuration est abandonnee")
+parser.add_argument("--space", default=None, help="Espace de recherche JSON (defaut : hyperparam_search.DEFAULT_SPACE)")
+args = parser.parse_args()
+
 # Configuration MLflow
 mlflow.set_tracking_uri("./mlruns")
 mlflow.set_experiment("bank-churn-prediction")
 
 print("Chargement des donnees...")
-df = pd.read_csv("data/bank_churn.csv")
+df = read_table("data/bank_churn.csv")
 
 print(f"Dataset : {len(df)} lignes, {len(df.columns)} colonnes")
 print(f"Taux de churn : {df['Exited'].mean():.2%}")
@@ -35,24 +52,62 @@ X_train, X_test, y_train, y_test = train_test_split(
     X, y, test_size=0.2, random_state=42, stratify=y
 )
 
+# Parametres du modele (remplaces par la meilleure configuration en mode recherche)
+params = {
+    'n_estimators': 100,
+    'max_depth': 10,
+    'min_samples_split': 5,
+    'random_state': 42
+}
+
 print(f"\nTrain : {len(X_train)} lignes")
 print(f"Test : {len(X_test)} lignes")
 
+
+def log_trial(trial):
+    # Un run MLflow imbrique par configuration (terminee ou abandonnee)
+    with mlflow.start_run(run_name=f"trial-{trial.number}", nested=True):
+        mlflow.log_params(trial.params)
+        mlflow.log_metrics(trial.metrics())
+        mlflow.set_tags({"trial_status": trial.status, "search_mode": args.search})
+    print(
+        f"  essai {trial.number:>3} {trial.status:<9} ROC AUC {trial.mean_score:.4f} "
+        f"({len(trial.folds)} plis) {trial.params}"
+    )
+
+
 # Entrainement avec MLflow tracking
-print("\nEntrainement du modele...")
-with mlflow.start_run(run_name="random-forest-v1"):
-    
-    # Parametres du modele
-    params = {
-        'n_estimators': 100,
-        'max_depth': 10,
-        'min_samples_split': 5,
-        'random_state': 42
-    }
-    
-    # Entrainement
-    model = RandomForestClassifier(**params)
+run_name = "random-forest-v1" if args.search == "none" else f"random-forest-{args.search}-search"
+with mlflow.start_run(run_name=run_name):
+
+    if args.search != "none":
+        # Meme donnees et meme split que ci-dessus, prepares une fois pour tous les essais
+        data = prepare_data(df, cv=args.cv, random_state=42)
+        param_list = candidates(load_space(args.space), args.search, args.n_iter, random_state=42)
+        print(f"\nRecherche {args.search} : {len(param_list)} configurations x {args.cv} plis")
+
+        search_start = time.perf_counter()
+        trials = search(data, param_list, n_jobs=args.n_jobs, margin=args.margin, on_trial=log_trial)
+        best = best_trial(trials)
+        pruned = sum(1 for t in trials if t.status == "pruned")
+
+        mlflow.log_metrics({
+            "search_seconds": time.perf_counter() - search_start,
+            "search_trials": len(trials),
+            "search_pruned": pruned,
+            "best_cv_roc_auc": best.mean_score,
+        })
+        print(f"Meilleure configuration (essai {best.number}, ROC AUC CV {best.mean_score:.4f}) : {best.params}")
+        print(f"{pruned}/{len(trials)} configurations abandonnees avant la fin")
+        params = {**best.params, 'random_state': 42}
+
+    print("\nEntrainement du modele...")
+
+    # Entrainement sur tous les coeurs, puis n_jobs remis a 1 pour le service
+    # (un predict_proba d'une ligne ne doit pas lancer un pool de threads)
+    model = RandomForestClassifier(**params, n_jobs=args.n_jobs)
     model.fit(X_train, y_train)
+    model.set_params(n_jobs=None)
     
     # Predictions
     y_pred = model.predict(X_test)